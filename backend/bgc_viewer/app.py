@@ -1,21 +1,33 @@
-from flask import Flask, jsonify, request, send_from_directory, session
+from flask import Flask, g, jsonify, request, send_from_directory, session
 from flask_cors import CORS
+from flask_compress import Compress
 from flask_session import Session
+import hashlib
+import importlib.util
 import json
+import mimetypes
+import multiprocessing
 import os
+import queue
+import sys
 import threading
 from pathlib import Path
 from typing import Optional
-from functools import lru_cache
+from functools import lru_cache, wraps
+from itertools import islice
+from operator import attrgetter
 from waitress import serve
+from werkzeug.security import safe_join
 from dotenv import load_dotenv
 
 # Import version from package
 from . import __version__
-from .preprocessing import preprocess_antismash_files
+from .preprocessing import run_preprocessing_worker
 from .data_loader import load_specific_record
-from .file_utils import match_location
+from .file_utils import iter_json_entries, scan_json_entries
 from .database import get_database_entries, get_database_info
+from .record_index import build_record_index, find_overlapping_features
+from .json_provider import OrjsonProvider
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,6 +37,20 @@ load_dotenv()
 # LOCAL mode (default): Full access to filesystem, preprocessing, etc.
 PUBLIC_MODE = os.getenv('BGCV_PUBLIC_MODE', 'false').lower() == 'true'
 
+# Number of threads used to walk subdirectories when scanning folders for JSON files
+SCAN_WORKERS = int(os.getenv('BGCV_SCAN_WORKERS', '16'))
+
+# Page sizes for the optional pagination of feature lists
+FEATURES_PER_PAGE = 500
+MAX_FEATURES_PER_PAGE = 2000
+
+# Vite emits content-hashed bundles under assets/, so browsers can cache them indefinitely
+HASHED_ASSETS_PREFIX = 'assets/'
+HASHED_ASSETS_MAX_AGE = 60 * 60 * 24 * 30
+
+# Precompressed variants written next to frontend files at build time, in order of preference
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
 # Get the directory where this module is installed
 app_dir = Path(__file__).parent
 # Look for frontend build directory (in development: ../../frontend/build, in package: static)
@@ -36,6 +62,28 @@ if not frontend_build_dir.exists():
 app = Flask(__name__, 
            static_folder=str(frontend_build_dir),
            static_url_path='/static')
+app.json = OrjsonProvider(app)
+
+# Let a fronting web server (e.g. Apache with mod_xsendfile) send static file bodies
+app.config['USE_X_SENDFILE'] = os.getenv('BGCV_X_SENDFILE', 'false').lower() == 'true'
+
+# Compress JSON responses for clients that accept it
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL'] = 6
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_REGISTER'] = False
+compress = Compress(app)
+
+
+@app.after_request
+def compress_response(response):
+    """Compress responses, except files which are passed straight to the server."""
+    # Leaving file responses untouched lets the WSGI server send them with its file
+    # wrapper (sendfile under gunicorn) or a proxy with X-Sendfile; frontend text
+    # assets are precompressed at build time instead
+    if response.direct_passthrough:
+        return response
+    return compress.after_request(response)
 
 # Configure session management
 if PUBLIC_MODE:
@@ -64,11 +112,19 @@ if PUBLIC_MODE:
         app.config['SESSION_TYPE'] = 'cachelib'
         app.config['SESSION_CACHELIB'] = FileSystemCache(cache_dir=session_dir)
 else:
-    # Use filesystem for local development
-    from cachelib.file import FileSystemCache
-    session_dir = os.getenv('SESSION_DIR', '/tmp/bgc_viewer_sessions')
-    app.config['SESSION_TYPE'] = 'cachelib'
-    app.config['SESSION_CACHELIB'] = FileSystemCache(cache_dir=session_dir)
+    # Local mode: 'cookie' (default) keeps the few small session fields in Flask's signed
+    # cookie, so requests need no session storage at all; 'memory' and 'filesystem'
+    # store them server-side
+    local_sessions = os.getenv('BGCV_LOCAL_SESSIONS', 'cookie').lower()
+    if local_sessions == 'memory':
+        from cachelib.simple import SimpleCache
+        app.config['SESSION_TYPE'] = 'cachelib'
+        app.config['SESSION_CACHELIB'] = SimpleCache(threshold=10000)
+    elif local_sessions == 'filesystem':
+        from cachelib.file import FileSystemCache
+        session_dir = os.getenv('SESSION_DIR', '/tmp/bgc_viewer_sessions')
+        app.config['SESSION_TYPE'] = 'cachelib'
+        app.config['SESSION_CACHELIB'] = FileSystemCache(cache_dir=session_dir)
 
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_COOKIE_NAME'] = 'bgc_viewer_session'
@@ -78,7 +134,8 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 if PUBLIC_MODE and os.getenv('HTTPS_ENABLED', 'false').lower() == 'true':
     app.config['SESSION_COOKIE_SECURE'] = True
 
-Session(app)
+if 'SESSION_TYPE' in app.config:
+    Session(app)
 
 # Configure CORS based on mode
 if PUBLIC_MODE:
@@ -98,11 +155,87 @@ else:
 # In LOCAL mode: Paths come from session/environment
 PUBLIC_INDEX_DIR = "/index"
 PUBLIC_DATA_ROOT = "/data_root"
+# Prefix every data file path must start with in PUBLIC mode
+PUBLIC_DATA_ROOT_PREFIX = os.path.join(os.path.normpath(PUBLIC_DATA_ROOT), "")
+
+PUBLIC_DATABASE_PATH = str(Path(PUBLIC_INDEX_DIR) / os.getenv('BGCV_INDEX_FILENAME', 'attributes.db'))
 
 def get_public_database_path():
     """Get the full path to the database file in PUBLIC mode."""
-    filename = os.getenv('BGCV_INDEX_FILENAME', 'attributes.db')
-    return str(Path(PUBLIC_INDEX_DIR) / filename)
+    return PUBLIC_DATABASE_PATH
+
+# The mode is fixed at startup, so the lookups of the current database are
+# specialized here instead of branching on PUBLIC_MODE in every request
+if PUBLIC_MODE:
+    def get_current_database_path():
+        """Get the path of the database to serve; fixed in PUBLIC mode."""
+        return PUBLIC_DATABASE_PATH
+
+    def get_current_data_root():
+        """Get the data root of the database to serve; fixed in PUBLIC mode."""
+        return PUBLIC_DATA_ROOT
+
+    def get_entry_data_root(db_path):
+        """
+        Get the data root to load entries of the database from; fixed in PUBLIC mode.
+
+        Returns:
+            Tuple of (data_root, None), or (None, error response) if it can't be determined
+        """
+        return PUBLIC_DATA_ROOT, None
+
+    def is_data_file_allowed(file_path):
+        """
+        Check that a data file lies within the data root folder (security check).
+
+        The check is lexical: '..' components and absolute filenames are rejected without
+        touching the filesystem, while symlinks inside the mounted data root are trusted.
+        """
+        return os.path.normpath(file_path).startswith(PUBLIC_DATA_ROOT_PREFIX)
+else:
+    def get_current_database_path():
+        """Get the path of the database selected in the current session, or None."""
+        return session.get('current_database_path')
+
+    def get_current_data_root():
+        """Get the data root of the database selected in the current session, or None."""
+        # Stored in the session when the database is selected
+        data_root = session.get('current_data_root')
+        if data_root is None:
+            # Sessions created before the data root was stored in them
+            db_path = session.get('current_database_path')
+            if db_path:
+                db_info = get_database_info(db_path)
+                if "error" not in db_info:
+                    data_root = db_info.get('data_root')
+        return data_root
+
+    def get_entry_data_root(db_path):
+        """
+        Read the data root of a database from its metadata and store it in the session.
+
+        Returns:
+            Tuple of (data_root, None), or (None, error response) if it can't be determined
+        """
+        if not Path(db_path).exists():
+            return None, (jsonify({"error": f"Database file does not exist: {db_path}"}), 404)
+
+        try:
+            db_info = get_database_info(db_path)
+            if "error" in db_info:
+                return None, (jsonify({"error": f"Failed to read database metadata: {db_info.get('error')}"}), 500)
+            data_root = db_info.get('data_root')
+            if not data_root:
+                return None, (jsonify({"error": "Database metadata missing data_root"}), 500)
+        except Exception as e:
+            return None, (jsonify({"error": f"Invalid data_root in database metadata: {str(e)}"}), 500)
+        # Refresh the data root the record endpoints read from the session
+        session['current_data_root'] = data_root
+        return data_root, None
+
+    def is_data_file_allowed(file_path):
+        """Check that a data file may be served; any local file is allowed."""
+        return True
 
 # Preprocessing status tracking (only used in LOCAL_MODE)
 if not PUBLIC_MODE:
@@ -115,6 +248,22 @@ if not PUBLIC_MODE:
         'error_message': None,
         'folder_path': None
     }
+    # Published status dicts are never mutated: writers swap in an updated copy under
+    # this lock, so readers can serialize the current reference without locking
+    PREPROCESSING_STATUS_LOCK = threading.Lock()
+    # Notified whenever a new status is published, for the status streams
+    PREPROCESSING_STATUS_CHANGED = threading.Condition(PREPROCESSING_STATUS_LOCK)
+    # Minimum number of seconds between published progress updates
+    PROGRESS_UPDATE_INTERVAL = 0.2
+    # Seconds between keepalive comments on an idle status stream
+    STATUS_STREAM_KEEPALIVE = 15
+
+    def update_preprocessing_status(**changes):
+        """Publish a new preprocessing status with the given fields changed."""
+        global PREPROCESSING_STATUS
+        with PREPROCESSING_STATUS_CHANGED:
+            PREPROCESSING_STATUS = {**PREPROCESSING_STATUS, **changes}
+            PREPROCESSING_STATUS_CHANGED.notify_all()
 
 # LRU cache for loaded AntiSMASH data to support multiple users efficiently
 @lru_cache(maxsize=100)
@@ -140,54 +289,194 @@ def load_cached_entry(entry_id: str, db_path: str, data_dir: str):
     return load_specific_record(str(file_path), record_id, data_dir)
 
 
-def get_current_entry_data():
+@lru_cache(maxsize=100)
+def load_cached_index(entry_id: str, db_path: str, data_dir: str):
     """
-    Get the currently loaded AntiSMASH data for the current session.
+    Build and cache lookup structures for the records of an entry.
+    
+    Args:
+        entry_id: Entry ID in format "filename:record_id"
+        db_path: Full path to the database file (used as cache key)
+        data_dir: Data directory path (where the JSON files are located)
     
     Returns:
-        Tuple of (data, data_root) or (None, None) if no data loaded
+        Dictionary mapping record IDs to their record index, or None if the
+        entry could not be loaded
+    """
+    # Taken before loading, so a file changed in between gets a new ETag on its next load
+    filename = entry_id.split(':', 1)[0]
+    stat = os.stat(Path(data_dir) / filename)
+    data = load_cached_entry(entry_id, db_path, data_dir)
+    if not data:
+        return None
+    
+    indexes = {}
+    for record in data.get("records", []):
+        record_id = record.get("id")
+        if record_id not in indexes:
+            record_index = build_record_index(record)
+            # Derived from the source file's version, so every worker process and every
+            # rebuild of this index gives the same ETag for the same data
+            record_index["etag"] = hashlib.blake2b(
+                f"{__version__}\0{entry_id}\0{record_id}\0{stat.st_mtime_ns}\0{stat.st_size}".encode(),
+                digest_size=8,
+            ).hexdigest()
+            # Regions are fixed for a loaded entry, so their response is serialized once
+            record_index["regions_response_body"] = app.json.dumps({
+                "record_id": record_id,
+                "regions": build_region_summaries(record_index),
+            }).encode()
+            indexes[record_id] = record_index
+    return indexes
+
+
+def build_region_summaries(record_index):
+    """
+    Summarize the region features of a record for the regions endpoint.
+    
+    Args:
+        record_index: Record index from build_record_index
+    
+    Returns:
+        List of region dictionaries sorted by start coordinate
+    """
+    regions = [{
+        "id": region.id,
+        "region_number": region.region_number,
+        "location": region.location,
+        "start": region.start or 0,
+        "end": region.end or 0,
+        "product": region.product,
+        "rules": region.rules
+    } for region in record_index["region_infos"]]
+    
+    return sorted(regions, key=lambda x: x['start'])
+
+
+def get_current_entry_key():
+    """
+    Get the cache key of the entry loaded in the current session.
+    
+    Returns:
+        Tuple of (entry_id, db_path, data_root) or None if no data loaded
     """
     entry_id = session.get('loaded_entry_id')
     if not entry_id:
-        return None, None
+        return None
     
-    # Determine database path and data root based on mode
-    if PUBLIC_MODE:
-        db_path = get_public_database_path()
-        data_root = PUBLIC_DATA_ROOT
-    else:
-        # In LOCAL_MODE, get from session
-        db_path = session.get('current_database_path')
-        if not db_path:
-            return None, None
-        
-        # Load data_root from database metadata
-        try:
-            db_info = get_database_info(db_path)
-            if "error" in db_info:
-                return None, None
-            data_root = db_info.get('data_root')
-            if not data_root:
-                # data_root is required
-                return None, None
-        except Exception:
-            # If we can't read metadata, we can't proceed
-            return None, None
+    db_path = get_current_database_path()
+    data_root = get_current_data_root()
+    if not db_path or not data_root:
+        return None
     
-    # Load from cache (using db_path as part of cache key)
-    try:
-        data = load_cached_entry(entry_id, db_path, data_root)
-        return data, data_root
-    except Exception:
-        return None, None
+    return entry_id, db_path, data_root
 
 
+def get_current_entry_index():
+    """
+    Get the record lookup structures for the entry loaded in the current session.
+    
+    Returns:
+        Dictionary mapping record IDs to their record index, or None if no data loaded
+    """
+    # Looked up once per request
+    if 'entry_index' not in g:
+        g.entry_index = None
+        entry_key = get_current_entry_key()
+        if entry_key is not None:
+            try:
+                g.entry_index = load_cached_index(*entry_key)
+            except Exception:
+                pass
+    return g.entry_index
+
+
+def get_current_record_index(record_id):
+    """
+    Get the lookup structures of a record in the entry loaded in the current session.
+    
+    Args:
+        record_id: ID of the record
+    
+    Returns:
+        Tuple of (loaded, record_index): loaded is False if no entry is loaded, and
+        record_index is None if the record isn't part of the loaded entry
+    """
+    entry_index = get_current_entry_index()
+    if entry_index is None:
+        return False, None
+    return True, entry_index.get(record_id)
+
+
+def conditional_record_response(view):
+    """
+    Decorate a record endpoint so clients can revalidate its responses with an ETag.
+    
+    Successful responses get the ETag of the record index they were built from.
+    A request whose If-None-Match holds that ETag is answered with 304 Not Modified
+    without running the view. The ETag changes whenever the entry is indexed again,
+    so clients always revalidate instead of caching for a fixed time (the same URL
+    serves a different record after another entry is loaded).
+    """
+    @wraps(view)
+    def decorated_view(record_id, **kwargs):
+        _, record_index = get_current_record_index(record_id)
+        cached_etag = None
+        if record_index is not None:
+            etag = record_index["etag"]
+            # Compressed responses carry the ETag with the encoding appended ("etag:br")
+            cached_etag = next((tag for tag in request.if_none_match
+                                if tag == etag or tag.startswith(f"{etag}:")), None)
+
+        if cached_etag:
+            response = app.response_class(status=304)
+            response.set_etag(cached_etag)
+        else:
+            response = app.make_response(view(record_id, **kwargs))
+            if record_index is None or response.status_code != 200:
+                return response
+            response.set_etag(record_index["etag"])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_view
+
+
+def send_frontend_file(path, **kwargs):
+    """
+    Send a file from the frontend build, preferring a precompressed variant.
+    
+    If the client accepts an encoding for which a '.br' or '.gz' file exists next to
+    the requested file, that file is sent with the matching Content-Encoding. File
+    responses are streamed and not compressed on the fly.
+    
+    Args:
+        path: Path of the file relative to the static folder
+        **kwargs: Passed on to send_from_directory
+    
+    Raises:
+        NotFound: If the file doesn't exist
+    """
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        compressed_path = safe_join(app.static_folder, path + suffix)
+        if compressed_path is not None and os.path.isfile(compressed_path):
+            response = send_from_directory(
+                app.static_folder, path + suffix,
+                mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+                **kwargs
+            )
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+    
+    return send_from_directory(app.static_folder, path, **kwargs)
 
 @app.route('/')
 def index():
     """Serve the main Vue.js SPA."""
     try:
-        return send_from_directory(app.static_folder, 'index.html')
+        return send_frontend_file('index.html')
     except FileNotFoundError:
         return jsonify({"error": "Frontend not built or not included in package. Run 'npm run build' in the frontend directory."}), 404
 
@@ -200,11 +489,15 @@ def spa_fallback(path):
     
     # For all other routes, try to serve static files first
     try:
-        return send_from_directory(app.static_folder, path)
+        if path.startswith(HASHED_ASSETS_PREFIX):
+            response = send_frontend_file(path, max_age=HASHED_ASSETS_MAX_AGE)
+            response.cache_control.immutable = True
+            return response
+        return send_frontend_file(path)
     except FileNotFoundError:
         # Fallback to index.html for SPA routing
         try:
-            return send_from_directory(app.static_folder, 'index.html')
+            return send_frontend_file('index.html')
         except FileNotFoundError:
             return jsonify({"error": "Frontend not found - ensure 'npm run build' was executed and static files are included in package"}), 404
 
@@ -212,18 +505,7 @@ def spa_fallback(path):
 def get_status():
     """API endpoint to get current file and data loading status."""
     # Determine the current data directory
-    current_data_root = None
-    
-    if PUBLIC_MODE:
-        # In public mode, use hardcoded data root
-        current_data_root = PUBLIC_DATA_ROOT
-    else:
-        # In local mode, check session database path
-        db_path = session.get('current_database_path')
-        if db_path:
-            db_info = get_database_info(db_path)
-            if "error" not in db_info:
-                current_data_root = db_info.get('data_root')
+    current_data_root = get_current_data_root()
     
     # Check if this session has loaded data
     has_loaded_data = session.get('loaded_entry_id') is not None
@@ -261,28 +543,35 @@ if not PUBLIC_MODE:
                     "path": str(resolved_path.parent)
                 })
             
-            # List directory contents
-            for item in sorted(resolved_path.iterdir()):
+            # List directory contents; DirEntry caches the file type from
+            # readdir, so only .json/.db entries need an extra stat for size
+            with os.scandir(resolved_path) as it:
+                entries = sorted(it, key=attrgetter('name'))
+
+            for entry in entries:
                 try:
-                    if item.is_dir():
+                    if entry.is_dir():
                         items.append({
-                            "name": item.name,
-                            "type": "directory", 
-                            "path": str(item)
+                            "name": entry.name,
+                            "type": "directory",
+                            "path": entry.path
                         })
-                    elif item.suffix.lower() == '.json':
+                        continue
+
+                    name = entry.name.lower()
+                    if name.endswith('.json'):
                         items.append({
-                            "name": item.name,
+                            "name": entry.name,
                             "type": "file",
-                            "path": str(item),
-                            "size": item.stat().st_size
+                            "path": entry.path,
+                            "size": entry.stat().st_size
                         })
-                    elif item.suffix.lower() == '.db':
+                    elif name.endswith('.db'):
                         items.append({
-                            "name": item.name,
+                            "name": entry.name,
                             "type": "database",
-                            "path": str(item),
-                            "size": item.stat().st_size
+                            "path": entry.path,
+                            "size": entry.stat().st_size
                         })
                 except (OSError, PermissionError):
                     # Skip items we can't access
@@ -319,21 +608,22 @@ if not PUBLIC_MODE:
                 return jsonify({"error": "Path is not a directory"}), 400
             
             # Scan recursively for JSON files
+            root = str(resolved_path)
+            # Entry paths start with the root, so relative paths are a slice
+            prefix_length = len(root.rstrip(os.sep)) + 1
             json_files = []
             try:
-                # Use rglob to recursively find all JSON files
-                for json_file in resolved_path.rglob('*.json'):
+                for entry in scan_json_entries(root, SCAN_WORKERS):
                     try:
-                        if json_file.is_file():
-                            # Calculate relative path from the base folder for display
-                            relative_path = json_file.relative_to(resolved_path)
-                            json_files.append({
-                                "name": json_file.name,
-                                "path": str(json_file),
-                                "relative_path": str(relative_path),
-                                "size": json_file.stat().st_size,
-                                "directory": str(json_file.parent.relative_to(resolved_path)) if json_file.parent != resolved_path else "."
-                            })
+                        # Calculate relative path from the base folder for display
+                        relative_path = entry.path[prefix_length:]
+                        json_files.append({
+                            "name": entry.name,
+                            "path": entry.path,
+                            "relative_path": relative_path,
+                            "size": entry.stat().st_size,
+                            "directory": os.path.dirname(relative_path) or "."
+                        })
                     except (OSError, PermissionError):
                         # Skip files we can't access
                         continue
@@ -371,39 +661,16 @@ def load_database_entry():
         
         filename, record_id = entry_id.split(':', 1)
         
-        # Determine the database path and data root based on mode
-        if PUBLIC_MODE:
-            db_path = get_public_database_path()
-            data_root = PUBLIC_DATA_ROOT
-        else:
-            # In LOCAL_MODE, use session database path
-            db_path_str = session.get('current_database_path')
-            if not db_path_str:
-                return jsonify({"error": "No database selected. Please select a database first."}), 400
-            db_path = db_path_str
-            if not Path(db_path).exists():
-                return jsonify({"error": f"Database file does not exist: {db_path_str}"}), 404
-            
-            # Get data_root from database metadata
-            try:
-                db_info = get_database_info(db_path)
-                if "error" not in db_info:
-                    data_root = db_info.get('data_root')
-                    if not data_root:
-                        return jsonify({"error": "Database metadata missing data_root"}), 500
-                else:
-                    return jsonify({"error": f"Failed to read database metadata: {db_info.get('error')}"}), 500
-            except Exception as e:
-                return jsonify({"error": f"Invalid data_root in database metadata: {str(e)}"}), 500
+        db_path = get_current_database_path()
+        if not db_path:
+            return jsonify({"error": "No database selected. Please select a database first."}), 400
+        data_root, error = get_entry_data_root(db_path)
+        if error:
+            return error
         
         file_path = Path(data_root) / filename
-        
-        # In public mode, ensure file is within the data root folder (security check)
-        if PUBLIC_MODE:
-            try:
-                file_path.resolve().relative_to(Path(data_root).resolve())
-            except ValueError:
-                return jsonify({"error": "Access denied: File must be within the data root folder"}), 403
+        if not is_data_file_allowed(file_path):
+            return jsonify({"error": "Access denied: File must be within the data root folder"}), 403
         
         if not file_path.exists():
             return jsonify({"error": f"File {filename} not found in database folder"}), 404
@@ -443,153 +710,142 @@ def load_database_entry():
             }
         })
         
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
         return jsonify({"error": f"Invalid JSON file: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to load entry: {str(e)}"}), 500
 
+def paginate_features(features):
+    """
+    Slice a feature list according to the optional page/per_page query parameters.
+    
+    Pagination is opt-in: without either parameter the full list is returned.
+    
+    Returns:
+        Tuple of (features, pagination) where pagination holds page, per_page and
+        total, or is None if no pagination was requested
+    """
+    if 'page' not in request.args and 'per_page' not in request.args:
+        return features, None
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', FEATURES_PER_PAGE, type=int), 1), MAX_FEATURES_PER_PAGE)
+    offset = (page - 1) * per_page
+    return features[offset:offset + per_page], {
+        "page": page,
+        "per_page": per_page,
+        "total": len(features)
+    }
+
 @app.route('/api/records/<record_id>/regions')
+@conditional_record_response
 def get_record_regions(record_id):
     """API endpoint to get all regions for a specific record."""
-    # Get data from session cache
-    antismash_data, data_root = get_current_entry_data()
+    # Get the record's lookup structures from session cache
+    loaded, record_index = get_current_record_index(record_id)
     
-    if not antismash_data:
+    if not loaded:
         return jsonify({"error": "No data loaded. Please load an entry first."}), 404
-    
-    record = next((r for r in antismash_data.get("records", []) if r.get("id") == record_id), None)
-    if not record:
+    if not record_index:
         return jsonify({"error": "Record not found"}), 404
     
-    # Filter features to get only regions
-    regions = []
-    for feature in record.get("features", []):
-        if feature.get("type") == "region":
-            # Parse location to get start/end coordinates
-            start, end = match_location(feature.get("location", "")) or (0, 0)
-            
-            region_info = {
-                "id": f"region_{feature.get('qualifiers', {}).get('region_number', ['unknown'])[0]}",
-                "region_number": feature.get('qualifiers', {}).get('region_number', ['unknown'])[0],
-                "location": feature.get("location"),
-                "start": start,
-                "end": end,
-                "product": feature.get('qualifiers', {}).get('product', ['unknown']),
-                "rules": feature.get('qualifiers', {}).get('rules', [])
-            }
-            regions.append(region_info)
-    
-    return jsonify({
-        "record_id": record_id,
-        "regions": sorted(regions, key=lambda x: x['start'])
-    })
+    # Serialized when the entry was indexed
+    return app.response_class(record_index["regions_response_body"], mimetype='application/json')
 
 @app.route('/api/records/<record_id>/regions/<region_id>/features')
+@conditional_record_response
 def get_region_features(record_id, region_id):
     """API endpoint to get all features within a specific region."""
-    # Get data from session cache
-    antismash_data, data_root = get_current_entry_data()
+    # Get the record's lookup structures from session cache
+    loaded, record_index = get_current_record_index(record_id)
     
-    if not antismash_data:
+    if not loaded:
         return jsonify({"error": "No data loaded. Please load an entry first."}), 404
-    
-    record = next((r for r in antismash_data.get("records", []) if r.get("id") == record_id), None)
-    if not record:
+    if not record_index:
         return jsonify({"error": "Record not found"}), 404
     
     # Find the region to get its boundaries
-    region_feature = None
-    for feature in record.get("features", []):
-        if (feature.get("type") == "region" and 
-            f"region_{feature.get('qualifiers', {}).get('region_number', [''])[0]}" == region_id):
-            region_feature = feature
-            break
-    
-    if not region_feature:
+    region = record_index["regions"].get(region_id)
+    if not region:
         return jsonify({"error": "Region not found"}), 404
     
-    # Parse region boundaries
-    region_location = region_feature.get("location", "")
-    region_start, region_end = match_location(region_location) or (None, None)
+    # Region boundaries were parsed when the record was indexed
+    region_location, region_start, region_end = region.location, region.start, region.end
     if region_start is None or region_end is None:
         return jsonify({"error": "Invalid region location format"}), 400
     
     # Get optional query parameters
     feature_type = request.args.get('type')
     
-    # Filter features that fall within the region boundaries
-    region_features = []
-    for feature in record.get("features", []):
-        # Skip the region feature itself
-        if feature.get("type") == "region":
-            continue
-            
-        # Parse feature location
-        feature_location = feature.get("location", "")
-        feature_start, feature_end = match_location(feature_location) or (None, None)
-        if feature_start is None or feature_end is None:
-            continue
-
-        # Check if feature overlaps with region (allow partial overlaps)
-        if not (feature_end < region_start or feature_start > region_end):
-            # Apply type filter if specified
-            if feature_type and feature.get("type") != feature_type:
-                continue
-            region_features.append(feature)
+    # Get features that overlap the region boundaries (allow partial overlaps)
+    region_features = find_overlapping_features(record_index, region_start, region_end, feature_type)
+    region_features, pagination = paginate_features(region_features)
     
-    return jsonify({
+    return app.json.streamed_response({
         "record_id": record_id,
         "region_id": region_id,
         "region_location": region_location,
         "region_boundaries": {"start": region_start, "end": region_end},
         "feature_type": feature_type or "all",
         "count": len(region_features),
+        **(pagination or {}),
         "features": region_features
-    })
+    }, "features")
 
 @app.route('/api/records/<record_id>/features')
+@conditional_record_response
 def get_record_features(record_id):
     """API endpoint to get all features for a specific record."""
-    # Get data from session cache
-    antismash_data, data_root = get_current_entry_data()
+    # Get the record's lookup structures from session cache
+    loaded, record_index = get_current_record_index(record_id)
     
-    if not antismash_data:
+    if not loaded:
         return jsonify({"error": "No data loaded. Please load an entry first."}), 404
+    if not record_index:
+        return jsonify({"error": "Record not found"}), 404
     
     # Get optional query parameters
     feature_type = request.args.get('type')
     limit = request.args.get('limit', type=int)
     
-    record = next((r for r in antismash_data.get("records", []) if r.get("id") == record_id), None)
-    if not record:
-        return jsonify({"error": "Record not found"}), 404
-    
-    features = record.get("features", [])
+    record = record_index["record"]
     
-    # Filter by type if specified
+    # Filter by type if specified, using the features bucketed by type at load time
     if feature_type:
-        features = [f for f in features if f.get("type") == feature_type]
+        features = record_index["by_type"].get(feature_type, [])
+    else:
+        features = record.get("features", [])
     
     # Limit results if specified
     if limit:
         features = features[:limit]
     
-    return jsonify({
+    features, pagination = paginate_features(features)
+    
+    return app.json.streamed_response({
         "record_id": record_id,
         "feature_type": feature_type or "all",
         "count": len(features),
+        **(pagination or {}),
         "features": features
-    })
+    }, "features")
+
+# The version response never changes at runtime, so it is serialized once
+VERSION_RESPONSE_BODY = app.json.dumps({
+    "version": __version__,
+    "name": "BGC Viewer"
+})
 
 @app.route('/api/version')
 def get_version():
     """API endpoint to get the application version."""
-    return jsonify({
-        "version": __version__,
-        "name": "BGC Viewer"
-    })
+    response = app.response_class(VERSION_RESPONSE_BODY, mimetype='application/json')
+    response.set_etag(__version__)
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response.make_conditional(request)
 
 @app.route('/api/records/<record_id>/mibig-entries/<locus_tag>')
+@conditional_record_response
 def get_mibig_entries(record_id, locus_tag):
     """API endpoint to get MiBIG entries for a specific locus_tag.
     
@@ -602,16 +858,14 @@ def get_mibig_entries(record_id, locus_tag):
     # Get region parameter from query string (defaults to "1")
     region = request.args.get('region', '1')
     
-    # Get data from session cache
-    antismash_data, data_root = get_current_entry_data()
+    # Get the record's lookup structures from session cache
+    loaded, record_index = get_current_record_index(record_id)
     
-    if not antismash_data:
+    if not loaded:
         return jsonify({"error": "No data loaded. Please load an entry first."}), 404
-    
-    # Find the specified record
-    record = next((r for r in antismash_data.get("records", []) if r.get("id") == record_id), None)
-    if not record:
+    if not record_index:
         return jsonify({"error": "Record not found"}), 404
+    record = record_index["record"]
     
     # Navigate to MiBIG entries: modules -> antismash.modules.clusterblast -> knowncluster -> mibig_entries -> region -> locus_tag
     modules = record.get("modules", {})
@@ -668,6 +922,7 @@ def get_mibig_entries(record_id, locus_tag):
     })
 
 @app.route('/api/records/<record_id>/tfbs-hits')
+@conditional_record_response
 def get_tfbs_hits(record_id):
     """API endpoint to get TFBS finder binding sites for a specific record.
     
@@ -680,16 +935,14 @@ def get_tfbs_hits(record_id):
     # Get region parameter from query string (defaults to "1")
     region = request.args.get('region', '1')
     
-    # Get data from session cache
-    antismash_data, data_root = get_current_entry_data()
+    # Get the record's lookup structures from session cache
+    loaded, record_index = get_current_record_index(record_id)
     
-    if not antismash_data:
+    if not loaded:
         return jsonify({"error": "No data loaded"}), 400
-    
-    # Find the specified record
-    record = next((r for r in antismash_data.get("records", []) if r.get("id") == record_id), None)
-    if not record:
+    if not record_index:
         return jsonify({"error": f"Record '{record_id}' not found"}), 404
+    record = record_index["record"]
     
     # Navigate to TFBS hits: modules -> antismash.modules.tfbs_finder -> hits_by_region -> region
     modules = record.get("modules", {})
@@ -716,6 +969,7 @@ def get_tfbs_hits(record_id):
     })
 
 @app.route('/api/records/<record_id>/tta-codons')
+@conditional_record_response
 def get_tta_codons(record_id):
     """API endpoint to get TTA codon positions for a specific record.
     
@@ -724,16 +978,14 @@ def get_tta_codons(record_id):
     
     Note: TTA codons are not region-specific and apply to the entire record.
     """
-    # Get data from session cache
-    antismash_data, data_root = get_current_entry_data()
+    # Get the record's lookup structures from session cache
+    loaded, record_index = get_current_record_index(record_id)
     
-    if not antismash_data:
+    if not loaded:
         return jsonify({"error": "No data loaded"}), 400
-    
-    # Find the specified record
-    record = next((r for r in antismash_data.get("records", []) if r.get("id") == record_id), None)
-    if not record:
+    if not record_index:
         return jsonify({"error": f"Record '{record_id}' not found"}), 404
+    record = record_index["record"]
     
     # Navigate to TTA codons: modules -> antismash.modules.tta -> TTA codons
     modules = record.get("modules", {})
@@ -747,6 +999,7 @@ def get_tta_codons(record_id):
     })
 
 @app.route('/api/records/<record_id>/resistance')
+@conditional_record_response
 def get_resistance_features(record_id):
     """API endpoint to get resistance features for a specific record.
     
@@ -756,16 +1009,14 @@ def get_resistance_features(record_id):
     Note: Resistance features are not region-specific and apply to the entire record.
     They are keyed by locus_tag (corresponding to CDS features).
     """
-    # Get data from session cache
-    antismash_data, data_root = get_current_entry_data()
+    # Get the record's lookup structures from session cache
+    loaded, record_index = get_current_record_index(record_id)
     
-    if not antismash_data:
+    if not loaded:
         return jsonify({"error": "No data loaded"}), 400
-    
-    # Find the specified record
-    record = next((r for r in antismash_data.get("records", []) if r.get("id") == record_id), None)
-    if not record:
+    if not record_index:
         return jsonify({"error": f"Record '{record_id}' not found"}), 404
+    record = record_index["record"]
     
     # Navigate to resistance features: modules -> antismash.detection.genefunctions -> tools -> resist -> best_hits
     modules = record.get("modules", {})
@@ -813,6 +1064,7 @@ if not PUBLIC_MODE:
         # Store database path in session
         try:
             session['current_database_path'] = result["database_path"]
+            session['current_data_root'] = result["data_root"]
         except Exception as e:
             return jsonify({
                 "error": f"Failed to save session data: {str(e)}. Session storage may be unavailable."
@@ -851,21 +1103,18 @@ def get_database_entries_endpoint():
     page = request.args.get('page', 1, type=int)
     per_page = min(request.args.get('per_page', 50, type=int), 100)  # Max 100 per page
     search = request.args.get('search', '').strip()
+    # Keyset pagination: continue after the entry given by a previous page's next_cursor
+    after_filename = request.args.get('after_filename')
+    after_record_id = request.args.get('after_record_id')
+    after = (after_filename, after_record_id) if after_filename is not None and after_record_id is not None else None
     
-    # Determine database path based on mode
-    if PUBLIC_MODE:
-        # In PUBLIC_MODE, use hardcoded database path
-        db_path = get_public_database_path()
-    else:
-        # In LOCAL_MODE, get from session
-        db_path = session.get('current_database_path')
-        if not db_path:
-            return jsonify({"error": "No database selected. Please select a database first."}), 400
-        if not Path(db_path).exists():
-            return jsonify({"error": f"Database file does not exist: {db_path}"}), 404
+    db_path = get_current_database_path()
+    if not db_path:
+        return jsonify({"error": "No database selected. Please select a database first."}), 400
     
-    # Use the database module function
-    result = get_database_entries(db_path, page, per_page, search)
+    # The path was validated when it was selected; a database that has gone
+    # missing since is reported by get_database_entries
+    result = get_database_entries(db_path, page, per_page, search, after)
     
     if "error" in result:
         return jsonify(result), 404 if "No database found" in result["error"] else 500
@@ -876,7 +1125,7 @@ def get_database_entries_endpoint():
 if not PUBLIC_MODE:
     @app.route('/api/preprocess-folder', methods=['POST'])
     def start_preprocessing():
-        """Start preprocessing a folder in a background thread."""
+        """Start preprocessing a folder in a background process."""
         global PREPROCESSING_STATUS
         
         if PREPROCESSING_STATUS['is_running']:
@@ -913,30 +1162,34 @@ if not PUBLIC_MODE:
             
             if selected_files and len(selected_files) > 0:
                 # Use the selected files
-                json_files_to_process = [Path(f) for f in selected_files if Path(f).suffix == '.json' and Path(f).exists()]
+                json_files_to_process = [Path(f) for f in selected_files if f.endswith('.json') and os.path.isfile(f)]
                 if not json_files_to_process:
                     return jsonify({"error": "None of the selected files are valid JSON files"}), 400
                 total_count = len(json_files_to_process)
             else:
-                # Fallback to all JSON files in the folder (recursive scan)
-                all_json_files = list(resolved_path.rglob("*.json"))[:5000]
+                # Fallback to the first 5000 JSON files in the folder (recursive scan, stops at the limit)
+                all_json_files = [Path(entry.path) for entry in islice(iter_json_entries(str(resolved_path)), 5000)]
                 if not all_json_files:
                     return jsonify({"error": "No JSON files found in the folder"}), 400
                 json_files_to_process = all_json_files
                 total_count = len(all_json_files)
             
-            # Reset status
-            PREPROCESSING_STATUS.update({
-                'is_running': True,
-                'current_file': None,
-                'files_processed': 0,
-                'total_files': total_count,
-                'status': 'running',
-                'error_message': None,
-                'folder_path': str(resolved_path)
-            })
+            # Reset status, checking again under the lock so concurrent requests can't both start
+            with PREPROCESSING_STATUS_CHANGED:
+                if PREPROCESSING_STATUS['is_running']:
+                    return jsonify({"error": "Preprocessing is already running"}), 409
+                PREPROCESSING_STATUS = {
+                    'is_running': True,
+                    'current_file': None,
+                    'files_processed': 0,
+                    'total_files': total_count,
+                    'status': 'running',
+                    'error_message': None,
+                    'folder_path': str(resolved_path)
+                }
+                PREPROCESSING_STATUS_CHANGED.notify_all()
             
-            # Start preprocessing in background thread
+            # Start preprocessing; the thread only relays the status reported by its process
             thread = threading.Thread(
                 target=run_preprocessing, 
                 args=(str(resolved_path), str(resolved_index_path), json_files_to_process)
@@ -951,56 +1204,95 @@ if not PUBLIC_MODE:
             })
             
         except Exception as e:
-            PREPROCESSING_STATUS['is_running'] = False
+            update_preprocessing_status(is_running=False)
             return jsonify({"error": f"Failed to start preprocessing: {str(e)}"}), 500
 
 @app.route('/api/preprocessing-status')
 def get_preprocessing_status():
     """Get the current preprocessing status."""
-    return jsonify(PREPROCESSING_STATUS)
+    # Read the reference once; the snapshot it points to is never mutated
+    status = PREPROCESSING_STATUS
+    return jsonify(status)
+
+if not PUBLIC_MODE:
+    @app.route('/api/preprocessing-status/stream')
+    def stream_preprocessing_status():
+        """Stream the preprocessing status as server-sent events.
+        
+        Sends the current status, then every newly published one, and ends after
+        a status that is no longer running. This replaces polling the status
+        endpoint, which stays available for clients without EventSource.
+        """
+        def events():
+            status = None
+            while True:
+                with PREPROCESSING_STATUS_CHANGED:
+                    if PREPROCESSING_STATUS is status:
+                        PREPROCESSING_STATUS_CHANGED.wait(STATUS_STREAM_KEEPALIVE)
+                    changed = PREPROCESSING_STATUS is not status
+                    status = PREPROCESSING_STATUS
+                
+                if not changed:
+                    # Keeps proxies from closing the idle connection
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"data: " + app.json.dumps(status).encode() + b"\n\n"
+                if not status['is_running']:
+                    return
+        
+        return app.response_class(events(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx from buffering the events
+            'X-Accel-Buffering': 'no'
+        })
 
 def run_preprocessing(folder_path, index_path, json_files=None):
-    """Run the preprocessing function in a background thread.
+    """Run preprocessing in a separate process and publish its status (runs in a background thread).
     
     Args:
         folder_path: Path to the folder to preprocess
         index_path: Full path to the index database file
         json_files: Optional list of specific JSON file paths to process
     """
-    global PREPROCESSING_STATUS
-    
-    def progress_callback(current_file, files_processed, total_files):
-        """Update preprocessing status with progress information."""
-        PREPROCESSING_STATUS.update({
-            'current_file': current_file,
-            'files_processed': files_processed,
-            'total_files': total_files
-        })
-    
     try:
-        # Run the preprocessing function
-        results = preprocess_antismash_files(
-            folder_path,
-            index_path,
-            progress_callback,
-            json_files
+        # Spawned rather than forked, so the child doesn't inherit locks held by server threads
+        context = multiprocessing.get_context('spawn')
+        status_queue = context.Queue()
+        # Not a daemon: daemonic processes can't start the pool of parsing workers
+        process = context.Process(
+            target=run_preprocessing_worker,
+            args=(folder_path, index_path, json_files, status_queue, PROGRESS_UPDATE_INTERVAL)
         )
-        
-        # Update status on completion
-        PREPROCESSING_STATUS.update({
-            'is_running': False,
-            'status': 'completed',
-            'current_file': None,
-            'files_processed': results['files_processed'],
-            'total_files': results['files_processed']  # Final count
-        })
-            
+        process.start()
     except Exception as e:
-        PREPROCESSING_STATUS.update({
-            'is_running': False,
-            'status': 'error',
-            'error_message': str(e)
-        })
+        update_preprocessing_status(
+            is_running=False,
+            status='error',
+            error_message=str(e)
+        )
+        return
+    
+    while True:
+        try:
+            changes = status_queue.get(timeout=1)
+        except queue.Empty:
+            if process.is_alive():
+                continue
+            try:
+                # The final status may have arrived just as the process exited
+                changes = status_queue.get(timeout=1)
+            except queue.Empty:
+                changes = {
+                    'is_running': False,
+                    'status': 'error',
+                    'error_message': f"Preprocessing process exited with code {process.exitcode}"
+                }
+        
+        update_preprocessing_status(**changes)
+        if not changes.get('is_running', True):
+            break
+    
+    process.join()
 
 @app.errorhandler(404)
 def not_found(error):
@@ -1058,7 +1350,7 @@ def main():
             )
     
     # Display session configuration
-    session_type = app.config.get('SESSION_TYPE', 'unknown')
+    session_type = app.config.get('SESSION_TYPE', 'signed cookie')
     print(f"Session storage: {session_type}")
     
     if session_type == 'redis':
@@ -1079,12 +1371,52 @@ def main():
     port = int(os.environ.get('BGCV_PORT', 5005))
     debug_mode = os.getenv('BGCV_DEBUG_MODE', 'False').lower() == 'true'
 
+    server = os.getenv('BGCV_SERVER', 'waitress').lower()
+
     if debug_mode:
         print(f"Running in debug mode on http://{host}:{port}")
         app.run(host=host, port=port, debug=True)
+    elif server == 'gunicorn':
+        run_gunicorn(host, port)
     else:
-        print(f"Running server on http://{host}:{port}")
-        serve(app, host=host, port=port, threads=4)
+        # Worker threads for concurrent requests; poll() lifts select()'s file descriptor limit
+        default_threads = min(32, max(8, (os.cpu_count() or 2) * 2))
+        threads = int(os.getenv('BGCV_THREADS', default_threads))
+        connection_limit = int(os.getenv('BGCV_CONNECTION_LIMIT', 1024))
+        print(f"Running server on http://{host}:{port} with {threads} threads")
+        serve(app, host=host, port=port, threads=threads,
+              connection_limit=connection_limit, asyncore_use_poll=True)
+
+
+def run_gunicorn(host: str, port: int):
+    """
+    Replace the current process with gunicorn using gevent workers.
+
+    Sessions are shared between workers only in PUBLIC_MODE (redis); local mode
+    keeps sessions and preprocessing status in process memory, so it always
+    runs a single worker.
+    """
+    if importlib.util.find_spec('gunicorn') is None or importlib.util.find_spec('gevent') is None:
+        raise RuntimeError(
+            "BGCV_SERVER=gunicorn requires gunicorn and gevent. "
+            "Install them with: pip install bgc-viewer[gunicorn]"
+        )
+
+    workers = int(os.getenv('BGCV_WORKERS', os.cpu_count() or 1)) if PUBLIC_MODE else 1
+    print(f"Running gunicorn on http://{host}:{port} with {workers} gevent workers")
+    args = [
+        sys.executable, '-m', 'gunicorn',
+        '--worker-class', 'gevent',
+        '--workers', str(workers),
+        '--bind', f'{host}:{port}',
+    ]
+    if workers > 1 and os.getenv('BGCV_PIN_WORKERS', 'false').lower() == 'true':
+        # Keep each worker on its own CPU so its caches stay warm
+        print("Pinning gunicorn workers to CPUs")
+        args += ['--config', 'python:bgc_viewer.gunicorn_config']
+    sys.stdout.flush()
+    os.execv(sys.executable, args + ['bgc_viewer.app:app'])
+
 
 if __name__ == '__main__':
     main()
@@ -1,44 +1,105 @@
 """
 Data loading and parsing utilities for BGC Viewer.
-Handles efficient JSON parsing using ijson with fallback to standard json.
+Handles efficient JSON parsing using ijson and orjson with fallback to standard json.
 Supports fast random access using byte position indexing.
 """
 
 import json
+import mmap
+import os
 import ijson
+import orjson
 import sqlite3
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, Union
+
+from .database import get_read_connection
+
+# Files up to this size are parsed in one go with orjson instead of streamed through ijson
+IN_MEMORY_PARSE_LIMIT = 50 * 1024 * 1024
+
+
+def loads_json(data: Union[bytes, memoryview]) -> Any:
+    """
+    Decode JSON bytes with orjson, falling back to the standard json module.
+    
+    The fallback accepts the NaN/Infinity literals that Python's json.dump writes
+    but orjson rejects.
+    
+    Raises:
+        json.JSONDecodeError: If the data isn't valid JSON
+        UnicodeDecodeError: If the data isn't valid UTF-8
+    """
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(bytes(data).decode('utf-8'))
+
+
+def load_json_file_mapped(file_path) -> Any:
+    """
+    Parse a whole JSON file from a read-only memory map.
+    
+    orjson parses the mapped pages directly, so the file is not first read
+    into a separate bytes buffer.
+    
+    Raises:
+        json.JSONDecodeError: If the file isn't valid JSON
+        UnicodeDecodeError: If the file isn't valid UTF-8
+        OSError: If the file can't be read
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped
+            return loads_json(b'')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return loads_json(view)
 
 
 def load_json_file(file_path):
-    """Load a JSON file using ijson with fallback to standard json."""
+    """
+    Load a JSON file using orjson, or ijson for files over IN_MEMORY_PARSE_LIMIT.
+    
+    The result isn't cached: whole parsed files can take hundreds of MB each.
+    """
+    size = os.stat(file_path).st_size
+    if size <= IN_MEMORY_PARSE_LIMIT:
+        # A one-shot parse with orjson's C parser is much faster than ijson's
+        # event stream, and the file fits comfortably in memory
+        return load_json_file_mapped(file_path)
+    
     try:
-        # Use ijson for efficient parsing
+        # The whole document is the single item at the root prefix; ijson builds it
+        # with its C backend (yajl2_c) when available
         with open(file_path, 'rb') as f:
-            parser = ijson.parse(f)
-            data = _build_data_structure(parser)
-            return data
+            return next(ijson.items(f, ''))
     except Exception as e:
         # Fallback to regular json if ijson fails
         print(f"ijson parsing failed for {file_path}, falling back to json: {e}")
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        return load_json_file_mapped(file_path)
 
 
-def get_record_index(file_path: str, data_dir: str = "data") -> Optional[sqlite3.Connection]:
-    """Get database connection for record index."""
-    data_path = Path(data_dir)
-    db_path = data_path / "attributes.db"
+def iter_records(file_path) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield the records of an antiSMASH JSON file.
     
-    if db_path.exists():
-        try:
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = sqlite3.Row  # Enable column access by name
-            return conn
-        except sqlite3.Error:
-            return None
-    return None
+    Only one record is built in memory at a time, and callers can stop early.
+    
+    Raises:
+        ijson.JSONError: If the file isn't valid JSON, or contains the NaN/Infinity
+            literals that ijson rejects
+    """
+    with open(file_path, 'rb') as f:
+        yield from ijson.items(f, 'records.item', use_float=True)
+
+
+def get_record_index(file_path: str, data_dir: str = "data") -> Optional[sqlite3.Connection]:
+    """Get the pooled read-only connection to the record index; callers must not close it."""
+    try:
+        return get_read_connection(Path(data_dir) / "attributes.db")
+    except (sqlite3.Error, OSError):
+        return None
 
 
 def load_record_by_index(file_path: str, target_record_id: str, data_dir: str = "data") -> Optional[Dict[str, Any]]:
@@ -51,11 +112,12 @@ def load_record_by_index(file_path: str, target_record_id: str, data_dir: str =
         data_dir: Directory containing the index database
         
     Returns:
-        Dictionary containing file metadata and the target record
+        Dictionary containing the target record, or None if the record can't
+        be loaded through the index
     """
     conn = get_record_index(file_path, data_dir)
     if not conn:
-        return load_specific_record_fallback(file_path, target_record_id)
+        return None
     
     try:
         # Calculate relative path from data_dir to match database entries
@@ -74,89 +136,88 @@ def load_record_by_index(file_path: str, target_record_id: str, data_dir: str =
         
         result = cursor.fetchone()
         if not result:
-            conn.close()
             return None
         
-        byte_start, byte_end = result['byte_start'], result['byte_end']
+        byte_start, byte_end = result
         
-        # Load the specific record using byte positions (skip metadata for performance)
-        with open(file_path, 'rb') as f:
-            f.seek(byte_start)
-            record_bytes = f.read(byte_end - byte_start)
-            
+        # Load the specific record using byte positions (skip metadata for performance).
+        # The file is memory-mapped so the record is parsed straight from the page cache,
+        # which is shared between processes, without copying it into a buffer first.
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
             try:
-                record_data = json.loads(record_bytes.decode('utf-8'))
-                conn.close()
+                with memoryview(mm) as view, view[byte_start:byte_end] as record_view:
+                    record_data = loads_json(record_view)
                 
                 return {
                     "records": [record_data]
                 }
             except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                conn.close()
-                return load_specific_record_fallback(file_path, target_record_id)
+                # Stale byte positions, e.g. the file changed after indexing
+                return None
     
     except Exception as e:
-        if conn:
-            conn.close()
-        return load_specific_record_fallback(file_path, target_record_id)
+        return None
 
 
 def load_specific_record(file_path, target_record_id, data_dir="data"):
-    """Load only a specific record from a JSON file for better performance."""
+    """
+    Load only a specific record from a JSON file for better performance.
+    
+    Loaded records are cached until the file's modification time or size
+    changes; callers must not modify the returned data.
+    
+    Raises:
+        OSError: If the file can't be accessed
+        json.JSONDecodeError: If the record isn't in the index and the file isn't valid JSON
+        UnicodeDecodeError: If the record isn't in the index and the file isn't valid UTF-8
+    """
+    stat = os.stat(file_path)
+    return _load_specific_record_cached(os.path.abspath(file_path), target_record_id, data_dir,
+                                        stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=32)
+def _load_specific_record_cached(file_path, target_record_id, data_dir, mtime_ns, size):
+    """Load a record; mtime_ns and size are only used as cache key."""
     # Try index-based loading first
     result = load_record_by_index(file_path, target_record_id, data_dir)
     if result:
         return result
 
-    # Fallback to original method
+    # Fall back to parsing the whole file
     return load_specific_record_fallback(file_path, target_record_id)
+
+
 def load_specific_record_fallback(file_path, target_record_id):
-    """Fallback method for loading specific record without index."""
+    """
+    Fallback method for loading specific record without index.
+    
+    Reads the file up to the record in a single streaming pass, so it is only
+    used when the record can't be located through the index. Like the indexed
+    path, only the record is returned, without the file's top-level metadata.
+    
+    Raises:
+        json.JSONDecodeError: If the file isn't valid JSON
+        UnicodeDecodeError: If the file isn't valid UTF-8
+    """
     try:
-        with open(file_path, 'rb') as f:
-            # Use ijson to parse and extract only the needed record
-            # First pass: get metadata
-            metadata = {}
-            for key, value in ijson.kvitems(f, ''):
-                if key != 'records':
-                    metadata[key] = value
-            
-            # Second pass: find the target record
-            f.seek(0)
-            records = ijson.items(f, 'records.item')
-            target_record = None
-            
-            for record in records:
-                if record.get('id') == target_record_id:
-                    target_record = record
-                    break
-            
-            if target_record:
-                return {
-                    **metadata,
-                    "records": [target_record]
-                }
-            else:
-                return None
-                
-    except Exception as e:
-        print(f"Optimized record loading failed: {e}, falling back to full file load")
-        # Fallback to loading the full file
-        try:
-            with open(file_path, 'r') as f:
-                full_data = json.load(f)
-            
-            # Find the specific record
-            for record in full_data.get("records", []):
-                if record.get("id") == target_record_id:
-                    return {
-                        **full_data,
-                        "records": [record]
-                    }
-            return None
-        except Exception as fallback_error:
-            print(f"Fallback loading also failed: {fallback_error}")
-            return None
+        # Stream the records and stop at the match
+        for record in iter_records(file_path):
+            if isinstance(record, dict) and record.get("id") == target_record_id:
+                return {"records": [record]}
+        return None
+    except ijson.JSONError:
+        # Parse the whole file instead, which accepts NaN literals or reports invalid JSON
+        pass
+    
+    full_data = load_json_file_mapped(file_path)
+    if not isinstance(full_data, dict):
+        return None
+    
+    for record in full_data.get("records", []):
+        if record.get("id") == target_record_id:
+            return {"records": [record]}
+    return None
 
 
 def list_available_records(filename: Optional[str] = None, data_dir: str = "data") -> Dict[str, Any]:
@@ -190,7 +251,6 @@ def list_available_records(filename: Optional[str] = None, data_dir: str = "data
             )
         
         results = cursor.fetchall()
-        conn.close()
         
         if filename:
             # Return records for specific file
@@ -210,8 +270,6 @@ def list_available_records(filename: Optional[str] = None, data_dir: str = "data
             return {"files": files}
     
     except Exception as e:
-        if conn:
-            conn.close()
         return {"error": f"Failed to query index: {e}"}
 
 
@@ -239,7 +297,6 @@ def get_record_metadata_from_index(filename: str, record_id: str, data_dir: str
         )
         
         result = cursor.fetchone()
-        conn.close()
         
         if result:
             return {
@@ -252,87 +309,4 @@ def get_record_metadata_from_index(filename: str, record_id: str, data_dir: str
         return None
     
     except Exception as e:
-        if conn:
-            conn.close()
         return None
-
-
-def _build_data_structure(parser):
-    """Build data structure from ijson parser events."""
-    data = {}
-    stack = [data]
-    path_stack = []
-    
-    for prefix, event, value in parser:
-        if event == 'start_map':
-            if prefix:
-                # Navigate to the correct location in the structure
-                current = _navigate_to_path(data, prefix.split('.'))
-                new_dict = {}
-                if isinstance(current, list):
-                    current.append(new_dict)
-                else:
-                    key = prefix.split('.')[-1]
-                    current[key] = new_dict
-                stack.append(new_dict)
-            else:
-                stack.append(data)
-        elif event == 'end_map':
-            if stack:
-                stack.pop()
-        elif event == 'start_array':
-            if prefix:
-                current = _navigate_to_path(data, prefix.split('.')[:-1])
-                key = prefix.split('.')[-1]
-                current[key] = []
-                stack.append(current[key])
-        elif event == 'end_array':
-            if stack:
-                stack.pop()
-        elif event in ('string', 'number', 'boolean', 'null'):
-            if prefix:
-                path_parts = prefix.split('.')
-                if path_parts[-1].isdigit():  # Array index
-                    # Handle array elements
-                    parent_path = path_parts[:-1]
-                    parent = _navigate_to_path(data, parent_path)
-                    if isinstance(parent, list):
-                        # Extend list if necessary
-                        index = int(path_parts[-1])
-                        while len(parent) <= index:
-                            parent.append(None)
-                        parent[index] = value
-                else:
-                    # Handle object properties
-                    parent_path = path_parts[:-1]
-                    key = path_parts[-1]
-                    parent = _navigate_to_path(data, parent_path)
-                    if isinstance(parent, dict):
-                        parent[key] = value
-            else:
-                # Root level value
-                return value
-    
-    return data
-
-
-def _navigate_to_path(data, path_parts):
-    """Navigate to a specific path in the data structure."""
-    current = data
-    for part in path_parts:
-        if part == '':
-            continue
-        if part.isdigit():
-            # Array index
-            index = int(part)
-            if isinstance(current, list):
-                while len(current) <= index:
-                    current.append({})
-                current = current[index]
-        else:
-            # Object key
-            if isinstance(current, dict):
-                if part not in current:
-                    current[part] = {}
-                current = current[part]
-    return current
@@ -3,8 +3,95 @@ Database operations for BGC Viewer.
 Handles SQLite queries for the attributes database.
 """
 
+import os
 import sqlite3
+import threading
+from functools import lru_cache
 from pathlib import Path
+from stat import S_ISREG
+from typing import Type
+
+import orjson
+
+# Prepared statements kept per read connection; every shape of the entries queries is
+# a separate statement
+READ_CONNECTION_CACHED_STATEMENTS = 256
+
+
+def connect_read_only(db_path):
+    """Open an existing SQLite database read-only.
+
+    Unlike a plain sqlite3.connect, this never creates an empty database file,
+    so callers don't need to check that the path exists first. Request handlers
+    use the pooled connections from get_read_connection instead.
+
+    Raises:
+        sqlite3.OperationalError: If the database can't be opened
+    """
+    return sqlite3.connect(f"{Path(db_path).absolute().as_uri()}?mode=ro", uri=True,
+                           cached_statements=READ_CONNECTION_CACHED_STATEMENTS)
+
+
+# Applied to every pooled read connection. The database files are never switched to
+# WAL: that needs write access next to them, and PUBLIC_MODE mounts them read-only.
+READ_CONNECTION_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -16384",
+)
+
+_os_thread_local: Type[threading.local]
+try:
+    from gevent.monkey import get_original
+except ImportError:
+    _os_thread_local = threading.local
+else:
+    # gevent workers patch threading.local to be per greenlet, and every request runs in
+    # a new greenlet; the original class keeps the pool per OS thread. The greenlets of a
+    # thread then share its connections, which is safe as SQLite calls never yield to them
+    _os_thread_local = get_original('threading', 'local')
+
+# Per-thread pool of read connections: absolute path -> ((st_dev, st_ino), connection)
+_read_connections = _os_thread_local()
+# Windows can't delete a database file that is open, which preprocessing does before
+# rebuilding it, so connections are only kept open on other systems
+POOL_READ_CONNECTIONS = os.name != 'nt'
+
+
+def get_read_connection(db_path):
+    """Get the calling thread's read-only connection to a database.
+
+    The connection is opened on first use and kept for later calls from the same
+    OS thread, so requests handled by a server thread (or by any greenlet of a
+    gevent worker) reuse its page cache and memory map. Callers must not close it. A database file that has been
+    replaced since (e.g. by preprocessing again) gets a new connection.
+
+    Raises:
+        OSError: If the database file doesn't exist
+        sqlite3.DatabaseError: If the database can't be opened
+    """
+    stat = os.stat(db_path)
+    identity = (stat.st_dev, stat.st_ino)
+    key = os.path.abspath(db_path)
+
+    pool = _read_connections.__dict__.setdefault('pool', {})
+    cached = pool.get(key)
+    if cached is not None:
+        if cached[0] == identity:
+            return cached[1]
+        cached[1].close()
+        del pool[key]
+
+    conn = connect_read_only(key)
+    try:
+        for pragma in READ_CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    if POOL_READ_CONNECTIONS:
+        pool[key] = (identity, conn)
+    return conn
 
 
 def get_database_info(db_file_path):
@@ -17,65 +104,225 @@ def get_database_info(db_file_path):
         Dictionary with database information or error
     """
     try:
-        resolved_path = Path(db_file_path).resolve()
-        
-        if not resolved_path.exists():
+        # A single stat per call; path resolution and reading happen once per file version
+        try:
+            stat = os.stat(db_file_path)
+        except (FileNotFoundError, NotADirectoryError):
             return {"error": "Database file does not exist"}
         
-        if not resolved_path.is_file() or resolved_path.suffix.lower() != '.db':
+        if not S_ISREG(stat.st_mode):
             return {"error": "Path is not a database file"}
         
-        # Try to read information from the database
-        try:
-            conn = sqlite3.connect(resolved_path)
-            
-            # Get data_root from metadata table
-            cursor = conn.execute("SELECT value FROM metadata WHERE key = 'data_root'")
-            row = cursor.fetchone()
-            
-            if row:
-                data_root = row[0]
-            else:
-                # data_root is required in metadata
-                conn.close()
-                return {"error": "Database metadata missing required 'data_root' field"}
-            
-            # Get version from metadata table
-            cursor = conn.execute("SELECT value FROM metadata WHERE key = 'version'")
-            version_row = cursor.fetchone()
-            db_version = version_row[0] if version_row else None
-            
-            # Get index stats
+        # Cache on the file's identity so rewriting the database invalidates the entry
+        return _read_database_info(os.path.abspath(db_file_path), stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        
+    except Exception as e:
+        return {"error": f"Failed to read database: {str(e)}"}
+
+
+@lru_cache(maxsize=32)
+def _read_database_info(db_path, mtime_ns, size, inode):
+    """Read metadata and index statistics from a database file.
+    
+    Args:
+        db_path: Absolute path to the database file
+        mtime_ns, size, inode: File stat values, only used as cache key
+        
+    Returns:
+        Dictionary with database information or error
+    """
+    resolved_path = Path(db_path).resolve()
+    if resolved_path.suffix.lower() != '.db':
+        return {"error": "Path is not a database file"}
+    
+    try:
+        conn = get_read_connection(resolved_path)
+        
+        cursor = conn.execute(
+            "SELECT key, value FROM metadata WHERE key IN ('data_root', 'version', 'indexed_files', 'total_records')"
+        )
+        metadata = dict(cursor.fetchall())
+        
+        # data_root is required in metadata
+        data_root = metadata.get('data_root')
+        if data_root is None:
+            return {"error": "Database metadata missing required 'data_root' field"}
+        
+        db_version = metadata.get('version')
+        
+        # Index stats are stored by preprocessing; databases from older versions are counted
+        if 'indexed_files' in metadata and 'total_records' in metadata:
+            indexed_files = int(metadata['indexed_files'])
+            total_records = int(metadata['total_records'])
+        else:
             cursor = conn.execute("SELECT COUNT(DISTINCT filename) FROM records")
             indexed_files = cursor.fetchone()[0]
             
             cursor = conn.execute("SELECT COUNT(*) FROM records")
             total_records = cursor.fetchone()[0]
-            
-            conn.close()
-            
-            return {
-                "database_path": str(resolved_path),
-                "data_root": data_root,
-                "version": db_version,
-                "index_stats": {
-                    "indexed_files": indexed_files,
-                    "total_records": total_records
-                }
+        
+        return {
+            "database_path": str(resolved_path),
+            "data_root": data_root,
+            "version": db_version,
+            "index_stats": {
+                "indexed_files": indexed_files,
+                "total_records": total_records
             }
-            
-        except sqlite3.Error as e:
-            return {"error": f"Invalid database file: {str(e)}"}
+        }
         
-    except Exception as e:
-        return {"error": f"Failed to read database: {str(e)}"}
+    except (sqlite3.Error, OSError, ValueError) as e:
+        return {"error": f"Invalid database file: {str(e)}"}
+
+
+def has_search_index(conn):
+    """Check whether a database has the trigram indexes of records and attribute values built by preprocessing."""
+    cursor = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('records_fts', 'attributes_fts')"
+    )
+    return cursor.fetchone()[0] == 2
+
 
+def like_pattern(term):
+    """Build a LIKE pattern matching term anywhere in a value, with % and _ in term matched literally."""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
 
-def get_database_entries(db_path, page=1, per_page=50, search=""):
-    """Get paginated list of all file+record entries from the database."""
+
+def match_phrase(term):
+    """Build a trigram MATCH expression finding term anywhere in a value, like like_pattern."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def has_precomputed_cluster_types(conn):
+    """Check whether a database stores each record's cluster types in the records table."""
+    cursor = conn.execute("SELECT 1 FROM pragma_table_info('records') WHERE name = 'cluster_types'")
+    return cursor.fetchone() is not None
+
+
+@lru_cache(maxsize=256)
+def build_entries_queries(indexed_terms, keyset, precomputed_cluster_types):
+    """Build the count and page queries of get_database_entries.
+    
+    The SQL only depends on the shape of the request, so it is built once per
+    shape. Requests of the same shape then pass identical strings, which the
+    pooled connections find in their statement cache instead of parsing and
+    planning them again.
+    
+    Args:
+        indexed_terms: For each search term, whether it is looked up in the trigram index
+        keyset: Whether the page starts after a given (filename, record_id)
+        precomputed_cluster_types: Whether the records table stores the cluster types
+    
+    Returns:
+        Tuple of (count query, page query). The parameters are two match_phrase
+        values per indexed search term and five like_pattern values per other
+        term, then the keyset values if any, then LIMIT and OFFSET for the page.
+    """
+    where_conditions = []
+    for indexed in indexed_terms:
+        # Each term must match at least one field
+        if indexed:
+            # The matching records are looked up in the trigram indexes, instead of
+            # scanning every record and the attributes of each record
+            where_conditions.append("""r.id IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?
+                                   UNION SELECT record_ref FROM attributes_fts WHERE attributes_fts MATCH ?)""")
+        else:
+            where_conditions.append("""(r.filename LIKE ? ESCAPE '\\' OR r.record_id LIKE ? ESCAPE '\\'
+                                   OR r.organism LIKE ? ESCAPE '\\' OR r.product LIKE ? ESCAPE '\\'
+                                   OR EXISTS (SELECT 1 FROM attributes a2 WHERE a2.record_ref = r.id
+                                              AND a2.attribute_value LIKE ? ESCAPE '\\'))""")
+    
+    if where_conditions:
+        count_query = "SELECT COUNT(*) FROM records r WHERE " + " AND ".join(where_conditions)
+    else:
+        # Without a search, use the record count stored by preprocessing; COALESCE only
+        # counts the records of older databases that don't have it
+        count_query = """
+            SELECT COALESCE(
+                (SELECT CAST(value AS INTEGER) FROM metadata WHERE key = 'total_records'),
+                (SELECT COUNT(*) FROM records)
+            )
+        """
+    
+    # Select the IDs of the page first; the rows and their attributes are only joined
+    # afterwards, so the join and grouping cover one page instead of the whole database.
+    # Index entries hold the rowid, so without a search the IDs come from a scan of the
+    # (filename, record_id) index alone and OFFSET skips index entries instead of rows
+    if keyset:
+        where_conditions.append("(r.filename, r.record_id) > (?, ?)")
+    page_query = "SELECT r.id FROM records r"
+    if where_conditions:
+        page_query += " WHERE " + " AND ".join(where_conditions)
+    page_query += """
+            ORDER BY r.filename, r.record_id
+            LIMIT ? OFFSET ?
+        """
+    
+    # Either way cluster_types is a JSON array, so values containing commas stay intact
+    if precomputed_cluster_types:
+        # The page's columns come straight from the records table
+        query = f"""
+            SELECT 
+                r.filename, 
+                r.record_id,
+                r.feature_count,
+                COALESCE(r.organism, 'Unknown') as organism,
+                COALESCE(r.product, '') as product,
+                r.cluster_types,
+                r.id
+            FROM ({page_query}) page
+            JOIN records r ON r.id = page.id
+            ORDER BY r.filename, r.record_id
+        """
+    else:
+        # Databases from older versions: collect the cluster types from the attributes
+        query = f"""
+            SELECT 
+                r.filename, 
+                r.record_id,
+                r.feature_count,
+                COALESCE(r.organism, 'Unknown') as organism,
+                COALESCE(r.product, '') as product,
+                json_group_array(DISTINCT a.attribute_value)
+                    FILTER (WHERE a.attribute_name LIKE '%type' OR a.attribute_name LIKE '%category') as cluster_types,
+                r.id
+            FROM ({page_query}) page
+            JOIN records r ON r.id = page.id
+            LEFT JOIN attributes a ON r.id = a.record_ref
+            GROUP BY r.id
+            ORDER BY r.filename, r.record_id
+        """
+    
+    return count_query, query
+
+
+def get_database_entries(db_path, page=1, per_page=50, search="", after=None):
+    """Get paginated list of all file+record entries from the database.
+    
+    Pages are selected with OFFSET by default. Passing the next_cursor of the
+    previous page as after instead seeks directly to the following entries
+    through the (filename, record_id) index, which keeps deep pages as fast
+    as the first one.
+    
+    Args:
+        db_path: Path to the database file
+        page: 1-based page number, used when after is not given
+        per_page: Number of entries per page (max 100)
+        search: Space separated terms that must all match
+        after: Optional (filename, record_id) of the last entry of the previous page
+    """
     per_page = min(per_page, 100)  # Max 100 per page
     
-    if not db_path or not Path(db_path).exists():
+    conn = None
+    if db_path:
+        try:
+            conn = get_read_connection(db_path)
+        except (sqlite3.OperationalError, OSError):
+            pass
+        except sqlite3.Error as e:
+            return {"error": f"Failed to query database: {str(e)}"}
+    if conn is None:
         return {
             "error": "No database found. Please select a folder and preprocess some data first.",
             "entries": [],
@@ -86,46 +333,21 @@ def get_database_entries(db_path, page=1, per_page=50, search=""):
         }
     
     try:
-        conn = sqlite3.connect(db_path)
-        
-        # Build query to get records with additional stats from attributes
-        base_query = """
-            SELECT 
-                r.filename, 
-                r.record_id,
-                r.feature_count,
-                COALESCE(r.organism, 'Unknown') as organism,
-                COALESCE(r.product, '') as product,
-                GROUP_CONCAT(DISTINCT CASE WHEN a.attribute_name LIKE '%type' OR a.attribute_name LIKE '%category' THEN a.attribute_value END) as cluster_types,
-                r.id
-            FROM records r
-            LEFT JOIN attributes a ON r.id = a.record_ref
-        """
-        count_query = """
-            SELECT COUNT(*) FROM records r
-        """
+        # Split search into multiple terms by space and apply AND logic
+        search_terms = search.strip().split() if search else []
+        use_search_index = bool(search_terms) and has_search_index(conn)
+        # Terms shorter than a trigram can't be looked up in the search index
+        indexed_terms = tuple(use_search_index and len(term) >= 3 for term in search_terms)
+        count_query, query = build_entries_queries(
+            indexed_terms, after is not None, has_precomputed_cluster_types(conn)
+        )
         
         params = []
-        where_conditions = []
-        
-        # Add search filter if provided
-        if search:
-            # Split search into multiple terms by space and apply AND logic
-            search_terms = search.strip().split()
-            
-            for term in search_terms:
-                # Each term must match at least one field
-                search_condition = """(r.filename LIKE ? OR r.record_id LIKE ? OR r.organism LIKE ? OR r.product LIKE ? 
-                                   OR EXISTS (SELECT 1 FROM attributes a2 WHERE a2.record_ref = r.id AND a2.attribute_value LIKE ?))"""
-                where_conditions.append(search_condition)
-                term_param = f"%{term}%"
-                params.extend([term_param, term_param, term_param, term_param, term_param])
-        
-        # Build WHERE clause
-        if where_conditions:
-            where_clause = " WHERE " + " AND ".join(where_conditions)
-            base_query += where_clause
-            count_query += where_clause
+        for term, indexed in zip(search_terms, indexed_terms):
+            if indexed:
+                params.extend([match_phrase(term)] * 2)
+            else:
+                params.extend([like_pattern(term)] * 5)
         
         # Get total count
         cursor = conn.execute(count_query, params)
@@ -135,41 +357,44 @@ def get_database_entries(db_path, page=1, per_page=50, search=""):
         total_pages = (total + per_page - 1) // per_page
         offset = (page - 1) * per_page
         
-        # Get paginated results
-        query = base_query + """
-            GROUP BY r.id, r.filename, r.record_id, r.feature_count, r.organism, r.product
-            ORDER BY r.filename, r.record_id
-            LIMIT ? OFFSET ?
-        """
-        
-        cursor = conn.execute(query, params + [per_page, offset])
-        entries = []
+        page_params = list(params)
+        if after is not None:
+            page_params.extend(after)
+            offset = 0
         
-        for row in cursor.fetchall():
-            filename, record_id, feature_count, organism, product, cluster_types, internal_id = row
-            
-            # Handle product - convert single product to list format for compatibility
-            products = [product] if product and product.strip() else []
-            
-            entries.append({
+        # The rows are unpacked straight from the cursor, without copying them into a list first
+        entries = [
+            {
                 "filename": filename,
                 "record_id": record_id,
                 "feature_count": feature_count or 0,
                 "organism": organism or "Unknown",
-                "products": products,
-                "cluster_types": cluster_types.split(',') if cluster_types else [],
+                # Handle product - convert single product to list format for compatibility
+                "products": [product] if product and product.strip() else [],
+                "cluster_types": orjson.loads(cluster_types) if cluster_types else [],
                 "id": f"{filename}:{record_id}",  # Unique identifier for frontend
                 "internal_id": internal_id  # Internal database ID
-            })
+            }
+            for filename, record_id, feature_count, organism, product, cluster_types, internal_id
+            in conn.execute(query, page_params + [per_page, offset])
+        ]
         
-        conn.close()
+        # Cursor for the following page, if there can be one
+        next_cursor = None
+        if len(entries) == per_page:
+            next_cursor = {
+                "after_filename": entries[-1]["filename"],
+                "after_record_id": entries[-1]["record_id"]
+            }
         
         return {
             "entries": entries,
             "total": total,
-            "page": page,
+            # A page after a cursor isn't at a known page number
+            "page": page if after is None else None,
             "per_page": per_page,
             "total_pages": total_pages,
+            "next_cursor": next_cursor,
             "has_search": bool(search),
             "search": search
         }
@@ -2,14 +2,128 @@
 File system browsing and utility functions for BGC Viewer.
 """
 
+import os
 import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Iterator, List, Tuple
 
 
+# Simple location of the form "[start:end]", optionally with fuzzy "<" / ">" markers
+LOCATION_PATTERN = re.compile(r"\[<?(\d+):>?(\d+)\]")
+
+
+@lru_cache(maxsize=1 << 16)
 def match_location(location):
     """Match location string to extract start and end coordinates."""
-    location_match = re.match(r"\[<?(\d+):>?(\d+)\]", location)
+    location_match = LOCATION_PATTERN.match(location)
     if location_match:
         start = int(location_match.group(1))
         end = int(location_match.group(2))
         return start, end
     return None
+
+
+def list_directory(directory: str) -> Tuple[List[str], List[os.DirEntry]]:
+    """
+    List the subdirectories and JSON files directly inside a directory.
+
+    File types come from readdir via os.DirEntry, so no stat is needed per path.
+    Symlinked directories are not included; entries that can't be accessed are skipped.
+
+    Args:
+        directory: Directory to list
+
+    Returns:
+        Tuple of (subdirectory paths, os.DirEntry objects for files ending in '.json')
+
+    Raises:
+        OSError: If the directory itself can't be read
+    """
+    subdirectories = []
+    json_entries = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                elif entry.name.endswith('.json') and entry.is_file():
+                    json_entries.append(entry)
+            except OSError:
+                # Skip entries we can't access
+                continue
+    return subdirectories, json_entries
+
+
+def iter_json_entries(root: str) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield directory entries for JSON files below a folder.
+
+    Walks the tree depth-first with an explicit stack, so callers that only
+    need the first few files can stop early. Symlinked directories are not
+    descended into and unreadable subdirectories are skipped.
+
+    Args:
+        root: Directory to scan
+
+    Yields:
+        os.DirEntry objects for files ending in '.json'
+
+    Raises:
+        OSError: If the root directory can't be read
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            subdirectories, json_entries = list_directory(directory)
+        except OSError:
+            if directory == root:
+                raise
+            # Skip subdirectories we can't read
+            continue
+        yield from json_entries
+        stack.extend(subdirectories)
+
+
+def _list_subdirectory(directory: str) -> Tuple[List[str], List[os.DirEntry]]:
+    """List a subdirectory, treating it as empty if it can't be read."""
+    try:
+        return list_directory(directory)
+    except OSError:
+        return [], []
+
+
+def scan_json_entries(root: str, max_workers: int = 16) -> List[os.DirEntry]:
+    """
+    Recursively collect directory entries for JSON files below a folder.
+
+    Every directory is listed as a separate task in a thread pool, and the
+    subdirectories it contains are submitted as soon as it completes. The
+    blocking scandir/stat syscalls of the whole tree overlap this way, even
+    when most files are in one deep subtree (useful on network mounts).
+
+    Args:
+        root: Directory to scan
+        max_workers: Maximum number of scanning threads
+
+    Returns:
+        List of os.DirEntry objects for files ending in '.json' (unordered)
+
+    Raises:
+        OSError: If the root directory can't be read
+    """
+    subdirectories, json_entries = list_directory(root)
+    if not subdirectories:
+        return json_entries
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = {executor.submit(_list_subdirectory, d) for d in subdirectories}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirectories, entries = future.result()
+                json_entries.extend(entries)
+                pending.update(executor.submit(_list_subdirectory, d) for d in subdirectories)
+
+    return json_entries
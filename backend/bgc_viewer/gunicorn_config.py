@@ -0,0 +1,15 @@
+"""
+Gunicorn settings for pinning worker processes to CPUs (BGCV_PIN_WORKERS).
+"""
+
+import os
+
+
+def post_fork(server, worker):
+    """Pin each new worker to a single CPU, round robin over the CPUs the server may use."""
+    if not hasattr(os, 'sched_setaffinity'):
+        # Not supported on this platform (e.g. macOS)
+        return
+    cpus = sorted(os.sched_getaffinity(0))
+    # Worker ages start at 1 and increase for every worker the arbiter starts
+    os.sched_setaffinity(0, {cpus[(worker.age - 1) % len(cpus)]})
@@ -3,13 +3,57 @@ Preprocessing module for AntiSMASH JSON files.
 Extracts attributes into SQLite database.
 """
 
+import json
+import mmap
+import multiprocessing
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union, Callable
+from typing import Dict, List, Any, Optional, Union, Callable, Iterator, Tuple
+
+from .data_loader import loads_json
+from .file_utils import iter_json_entries
+
+# Number of files read ahead of the one being parsed
+PREFETCH_DEPTH = 4
+# Number of upcoming files the kernel is asked to read into the page cache
+READAHEAD_FILES = 16
+# Runs of anything but braces, closing brackets and strings (skipped whole), up to the
+# next brace or closing bracket. Possessive, so a truncated file fails without backtracking.
+STRUCTURE_PATTERN = re.compile(rb'(?:[^{}\]"]++|"(?:[^"\\]++|\\.)*+")*+[{}\]]', re.DOTALL)
+OPEN_BRACE = ord('{')
+CLOSE_BRACE = ord('}')
+# Page cache of the preprocessing connection, in KiB
+WRITE_CACHE_SIZE_KIB = 200000
+# Number of buffered record and attribute rows that triggers an insert
+INSERT_BATCH_ROWS = 50000
+# Minimum number of files before parsing is spread over worker processes
+PARALLEL_MIN_FILES = 16
+# Number of files queued per worker process ahead of the database writer
+PARSE_AHEAD_PER_WORKER = 4
+# Lowercase feature type -> records column counting the features of that type
+FEATURE_COUNT_KEYS = {
+    'protocluster': 'protocluster_count',
+    'proto_core': 'proto_core_count',
+    'pfam_domain': 'pfam_domain_count',
+    'cds': 'cds_count',
+    'cand_cluster': 'cand_cluster_count',
+}
 
 
 def create_attributes_database(db_path: Path) -> sqlite3.Connection:
-    """Create SQLite database for storing attributes and record index. Drops existing database if it exists."""
+    """Create SQLite database for storing attributes and record index. Drops existing database if it exists.
+    
+    Only the tables are created; their indexes are added by create_attributes_indexes after loading.
+    """
     # Remove existing database if it exists
     if db_path.exists():
         db_path.unlink()
@@ -41,6 +85,7 @@ def create_attributes_database(db_path: Path) -> sqlite3.Connection:
             pfam_domain_count INTEGER DEFAULT 0,
             cds_count INTEGER DEFAULT 0,
             cand_cluster_count INTEGER DEFAULT 0,
+            cluster_types TEXT,           -- JSON array of the record's type/category attribute values
             UNIQUE(filename, record_id)
         )
     """)
@@ -57,21 +102,71 @@ def create_attributes_database(db_path: Path) -> sqlite3.Connection:
         )
     """)
     
-    # Create indexes for efficient querying
+    conn.commit()
+    return conn
+
+
+def create_attributes_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Create the query indexes of the records and attributes tables and collect planner statistics.
+    
+    Called once all rows are inserted: building each index in one pass over the
+    finished table is much cheaper than updating it on every insert.
+    
+    Args:
+        conn: SQLite database connection
+    """
     conn.execute("CREATE INDEX IF NOT EXISTS idx_records_filename ON records (filename)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_records_record_id ON records (record_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_records_filename_record_id ON records (filename, record_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_records_product ON records (product)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_records_organism ON records (organism)")
     
+    # Attributes are only looked up by their record; values are searched through
+    # attributes_fts, so indexes on the other columns would only take up space
     conn.execute("CREATE INDEX IF NOT EXISTS idx_attributes_record_ref ON attributes (record_ref)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_attributes_origin ON attributes (origin)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_attributes_name ON attributes (attribute_name)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_attributes_value ON attributes (attribute_value)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_attributes_name_value ON attributes (attribute_name, attribute_value)")
     
+    # Statistics for the query planner, e.g. to choose between these indexes
+    conn.execute("ANALYZE")
     conn.commit()
-    return conn
+
+
+def build_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Build trigram full-text indexes over the searchable record fields and attribute values.
+    
+    With the trigram tokenizer, MATCH on a quoted term finds the rows containing
+    it as a (case-insensitive) substring from the index, instead of scanning
+    every record and attribute with `LIKE '%term%'`. The tables use the records
+    and attributes tables as external content, so values aren't stored twice.
+    Databases without them are searched with plain LIKE scans.
+    
+    Args:
+        conn: SQLite database connection, after all records and attributes are inserted
+    
+    Returns:
+        False if this SQLite build lacks FTS5 or the trigram tokenizer (SQLite < 3.34)
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE records_fts USING fts5(
+                filename, record_id, organism, product,
+                content='records', content_rowid='id', tokenize='trigram'
+            )
+        """)
+        conn.execute("""
+            CREATE VIRTUAL TABLE attributes_fts USING fts5(
+                attribute_value, record_ref UNINDEXED,
+                content='attributes', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        conn.rollback()
+        return False
+    conn.execute("INSERT INTO records_fts(records_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO attributes_fts(attributes_fts) VALUES ('rebuild')")
+    conn.commit()
+    return True
 
 
 def populate_metadata_table(conn: sqlite3.Connection, data_root: str) -> None:
@@ -115,26 +210,28 @@ def flatten_complex_value(value: Any, prefix: str = "") -> List[tuple]:
     Returns:
         List of (attribute_name, attribute_value) tuples
     """
-    results = []
-    
+    results: List[Tuple[str, str]] = []
+    _flatten_into(value, prefix, results.append)
+    return results
+
+
+def _flatten_into(value: Any, prefix: str, append) -> None:
+    """Append the flattened pairs of value to a shared list instead of merging per-level lists."""
     if isinstance(value, dict):
         for key, val in value.items():
-            new_prefix = f"{prefix}_{key}" if prefix else key
-            results.extend(flatten_complex_value(val, new_prefix))
+            _flatten_into(val, f"{prefix}_{key}" if prefix else key, append)
     
     elif isinstance(value, list):
         # Flatten arrays into multiple entries
         for item in value:
             if isinstance(item, (dict, list)):
-                results.extend(flatten_complex_value(item, prefix))
+                _flatten_into(item, prefix, append)
             else:
-                results.append((prefix, str(item)))
+                append((prefix, str(item)))
     
     else:
         # Simple value (string, number, boolean, etc.)
-        results.append((prefix, str(value)))
-    
-    return results
+        append((prefix, str(value)))
 
 
 def extract_record_metadata(record: Dict[str, Any], filename: str, record_id: str, byte_start: int, byte_end: int) -> Dict[str, Any]:
@@ -164,19 +261,12 @@ def extract_record_metadata(record: Dict[str, Any], filename: str, record_id: st
     if 'features' in record and isinstance(record['features'], list):
         metadata['feature_count'] = len(record['features'])
         
-        # Count specific feature types
-        for feature in record['features']:
-            feature_type = feature.get('type', '').lower()
-            if feature_type == 'protocluster':
-                metadata['protocluster_count'] += 1
-            elif feature_type == 'proto_core':
-                metadata['proto_core_count'] += 1
-            elif feature_type == 'pfam_domain':
-                metadata['pfam_domain_count'] += 1
-            elif feature_type == 'cds':
-                metadata['cds_count'] += 1
-            elif feature_type == 'cand_cluster':
-                metadata['cand_cluster_count'] += 1
+        # Count the raw types first, so only the distinct types are lowercased and looked up
+        type_counts = Counter([feature.get('type', '') for feature in record['features']])
+        for feature_type, count in type_counts.items():
+            count_key = FEATURE_COUNT_KEYS.get(feature_type.lower())
+            if count_key is not None:
+                metadata[count_key] += count
     
     # Extract organism from source features
     if 'features' in record and isinstance(record['features'], list):
@@ -197,45 +287,34 @@ def extract_record_metadata(record: Dict[str, Any], filename: str, record_id: st
     return metadata
 
 
-def extract_attributes_from_record(record: Dict[str, Any], record_ref_id: int) -> List[tuple]:
+def extract_attributes_from_record(record: Dict[str, Any], record_ref_id: Optional[int]) -> List[tuple]:
     """
     Extract all attributes from a record for the attributes table.
     
     Args:
         record: The record dictionary
-        record_ref_id: The internal ID from the records table
+        record_ref_id: The internal ID from the records table, or None if it isn't known yet
     
     Returns:
         List of tuples: (record_ref, origin, attribute_name, attribute_value)
     """
-    attributes = []
-    
     # Extract from annotations
-    if 'annotations' in record and isinstance(record['annotations'], dict):
-        for region_id, annotation_data in record['annotations'].items():
-            flattened = flatten_complex_value(annotation_data)
-            for attr_name, attr_value in flattened:
-                # Prepend region_id to attribute name
-                full_attr_name = f"{region_id}_{attr_name}" if attr_name else region_id
-                attributes.append((
-                    record_ref_id,
-                    'annotations',
-                    full_attr_name,
-                    attr_value
-                ))
+    annotations = record.get('annotations')
+    attributes = [
+        # Prepend region_id to attribute name
+        (record_ref_id, 'annotations', f"{region_id}_{attr_name}" if attr_name else region_id, attr_value)
+        for region_id, annotation_data in annotations.items()
+        for attr_name, attr_value in flatten_complex_value(annotation_data)
+    ] if isinstance(annotations, dict) else []
     
     # Extract from source features
     if 'features' in record and isinstance(record['features'], list):
-        for feature in record['features']:
-            if feature.get('type') == 'source' and 'qualifiers' in feature:
-                flattened = flatten_complex_value(feature['qualifiers'])
-                for attr_name, attr_value in flattened:
-                    attributes.append((
-                        record_ref_id,
-                        'source',
-                        attr_name,
-                        attr_value
-                    ))
+        attributes += [
+            (record_ref_id, 'source', attr_name, attr_value)
+            for feature in record['features']
+            if feature.get('type') == 'source' and 'qualifiers' in feature
+            for attr_name, attr_value in flatten_complex_value(feature['qualifiers'])
+        ]
     
     # Extract PFAM domains (avoid duplicates)
     if 'features' in record and isinstance(record['features'], list):
@@ -275,11 +354,409 @@ def extract_attributes_from_record(record: Dict[str, Any], record_ref_id: int) -
     return attributes
 
 
+def extract_cluster_types(attributes: List[tuple]) -> List[str]:
+    """
+    Get the distinct values of the attributes whose name ends in 'type' or 'category'.
+    
+    Args:
+        attributes: Attribute tuples from extract_attributes_from_record
+    
+    Returns:
+        The values in order of first occurrence
+    """
+    return list(dict.fromkeys(
+        attribute_value for _, _, attribute_name, attribute_value in attributes
+        if attribute_name.lower().endswith(('type', 'category'))
+    ))
+
+
+def advise_willneed(path: Path) -> None:
+    """
+    Ask the kernel to start reading a file into the page cache in the background.
+    
+    This keeps several reads queued on the device while files are read one by one.
+    It is only a hint: it does nothing on platforms without posix_fadvise or if the
+    file can't be opened.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def prefetch_file_contents(files: List[Path], depth: int = PREFETCH_DEPTH) -> Iterator[Tuple[Path, Union[bytes, OSError]]]:
+    """
+    Read files in a background thread while the caller processes earlier ones.
+    
+    Args:
+        files: Paths of the files to read, in processing order
+        depth: Maximum number of files held in memory ahead of the caller
+        
+    Yields:
+        Tuples of (path, content) in the order of files. If a file can't be read,
+        the OSError is yielded in place of its content.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    
+    def put(item) -> bool:
+        # Block until there is room, unless the consumer has gone away
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def reader():
+        for path in files[:READAHEAD_FILES]:
+            advise_willneed(path)
+        for i, path in enumerate(files):
+            if i + READAHEAD_FILES < len(files):
+                advise_willneed(files[i + READAHEAD_FILES])
+            try:
+                with open(path, 'rb') as f:
+                    item = (path, f.read())
+            except OSError as e:
+                item = (path, e)
+            if not put(item):
+                return
+        put(None)
+    
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is None:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_record_spans(content: Union[bytes, mmap.mmap]) -> Iterator[Tuple[int, int]]:
+    """
+    Find the objects in the "records" array of an antiSMASH JSON file.
+    
+    The regular expression skips everything but braces and closing brackets in
+    C, including whole strings, so braces inside string values are not counted
+    and the Python loop only runs once per brace.
+    
+    Args:
+        content: Raw file contents, as bytes or a read-only memory map
+        
+    Yields:
+        (byte_start, byte_end) of each record, end exclusive
+    """
+    # Find the records array boundaries
+    records_pos = content.find(b'"records"')
+    if records_pos == -1:
+        return
+    
+    # Find the opening bracket of records array
+    bracket_pos = content.find(b'[', records_pos)
+    if bracket_pos == -1:
+        return
+    
+    pos = bracket_pos + 1  # Start after opening bracket
+    depth = 0
+    record_start = None
+    match = STRUCTURE_PATTERN.match
+    
+    while True:
+        structure = match(content, pos)
+        if structure is None:
+            # Truncated file
+            return
+        pos = structure.end()
+        char = content[pos - 1]
+        
+        if char == OPEN_BRACE:
+            if depth == 0:
+                record_start = pos - 1
+            depth += 1
+        elif char == CLOSE_BRACE:
+            depth -= 1
+            if depth == 0 and record_start is not None:
+                # Found complete record
+                yield record_start, pos
+                record_start = None
+        elif depth == 0:
+            # End of records array
+            return
+
+
+def parse_antismash_content(content: Union[bytes, mmap.mmap], filename: str) -> List[Tuple[Dict[str, Any], List[tuple]]]:
+    """
+    Parse the records of an antiSMASH JSON file.
+    
+    Args:
+        content: Raw file contents, as bytes or a read-only memory map
+        filename: Filename stored with the records (relative to the input directory)
+        
+    Returns:
+        List of (record metadata, attributes) tuples in file order. The record_id is
+        None for records without an id, and the attribute tuples have None as record_ref;
+        both are filled in when the record is inserted. Malformed records are skipped.
+    """
+    parsed = []
+    for record_start, record_end in iter_record_spans(content):
+        # Parse the record JSON once for both its metadata and attributes
+        record_json = content[record_start:record_end]
+        try:
+            record = loads_json(record_json)
+            metadata = extract_record_metadata(
+                record, filename, record.get('id'), record_start, record_end
+            )
+            attributes = extract_attributes_from_record(record, None)
+            metadata['cluster_types'] = extract_cluster_types(attributes)
+            parsed.append((metadata, attributes))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # Skip malformed records
+            pass
+    
+    return parsed
+
+
+def parse_antismash_file(json_file: Path, input_path: Path,
+                         content: Optional[bytes] = None) -> Union[List[Tuple[Dict[str, Any], List[tuple]]], Exception]:
+    """
+    Read and parse a single antiSMASH JSON file.
+    
+    This runs in the worker processes of parse_antismash_files, so errors are
+    returned instead of raised and the caller can skip the file.
+    
+    Args:
+        json_file: Path of the file
+        input_path: Input directory; filenames are stored relative to it
+        content: File contents if they were already read
+        
+    Returns:
+        Result of parse_antismash_content, or the exception raised while processing the file
+    """
+    try:
+        filename = str(json_file.relative_to(input_path))
+        if content is None:
+            with open(json_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    # Empty files can't be mapped
+                    return parse_antismash_content(b'', filename)
+                # Map the file instead of reading it whole: pages are read in as the
+                # scanner reaches them and only each record's slice is copied
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return parse_antismash_content(mapped, filename)
+        return parse_antismash_content(content, filename)
+    except Exception as e:
+        return e
+
+
+def parse_antismash_files(
+    files: List[Path],
+    input_path: Path,
+    max_workers: Optional[int] = None
+) -> Iterator[Tuple[Path, Union[List[Tuple[Dict[str, Any], List[tuple]]], Exception]]]:
+    """
+    Parse antiSMASH JSON files, in a pool of worker processes if there are enough of them.
+    
+    Parsing is CPU-bound Python code, so threads would just take turns on the GIL.
+    Each worker process reads and parses whole files and sends back the extracted
+    rows, which leaves only the database inserts to the caller. At most a few files
+    per worker are parsed ahead of the caller to bound memory use.
+    
+    Args:
+        files: Paths of the files to parse, in processing order
+        input_path: Input directory; filenames are stored relative to it
+        max_workers: Maximum number of worker processes; defaults to the number of CPUs
+        
+    Yields:
+        Tuples of (path, result of parse_antismash_file) in the order of files
+    """
+    workers = min(max_workers or os.cpu_count() or 1, len(files))
+    if workers > 1 and len(files) >= PARALLEL_MIN_FILES:
+        try:
+            # Spawned workers don't inherit the locks held by the server's threads
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        except (OSError, NotImplementedError):
+            # No process support on this platform; parse in this process instead
+            executor = None
+        
+        if executor is not None:
+            pending: deque = deque()
+            try:
+                # Workers read whole files with blocking reads, so keep the device busy with
+                # readahead for the files after the ones they are working on
+                for json_file in files[:READAHEAD_FILES]:
+                    advise_willneed(json_file)
+                for i, json_file in enumerate(files):
+                    if i + READAHEAD_FILES < len(files):
+                        advise_willneed(files[i + READAHEAD_FILES])
+                    try:
+                        future = executor.submit(parse_antismash_file, json_file, input_path)
+                    except BrokenProcessPool:
+                        # A worker died (e.g. killed for running out of memory); keep what was
+                        # already submitted and parse the remaining files in this process
+                        while pending:
+                            yield _pop_parsed(pending)
+                        executor.shutdown(cancel_futures=True)
+                        yield from _parse_serially(files[i:], input_path)
+                        return
+                    pending.append((json_file, future))
+                    if len(pending) >= workers * PARSE_AHEAD_PER_WORKER:
+                        yield _pop_parsed(pending)
+                while pending:
+                    yield _pop_parsed(pending)
+            finally:
+                executor.shutdown(cancel_futures=True)
+            return
+    
+    yield from _parse_serially(files, input_path)
+
+
+def _parse_serially(
+    files: List[Path],
+    input_path: Path
+) -> Iterator[Tuple[Path, Union[List[Tuple[Dict[str, Any], List[tuple]]], Exception]]]:
+    """Parse files in this process, in the same form as parse_antismash_files."""
+    # Files are read ahead in a background thread so disk reads overlap with parsing
+    for json_file, content in prefetch_file_contents(files):
+        if isinstance(content, OSError):
+            yield json_file, content
+        else:
+            yield json_file, parse_antismash_file(json_file, input_path, content)
+
+
+def _pop_parsed(pending: deque) -> Tuple[Path, Any]:
+    """Wait for the oldest pending parse and return (path, result)."""
+    json_file, future = pending.popleft()
+    try:
+        return json_file, future.result()
+    except Exception as e:
+        # The result couldn't be sent back or the pool broke down
+        return json_file, e
+
+
+def build_insert_rows(
+    parsed: List[Tuple[Dict[str, Any], List[tuple]]],
+    first_record_id: int
+) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Build the records and attributes rows of a parsed file.
+    
+    Args:
+        parsed: (record_metadata, attributes) pairs from parse_antismash_file
+        first_record_id: Internal ID given to the first record; the others follow on
+        
+    Returns:
+        Tuple of (record_rows, attribute_rows)
+    """
+    record_rows = []
+    attribute_rows: List[tuple] = []
+    for offset, (record_metadata, attributes) in enumerate(parsed):
+        record_internal_id = first_record_id + offset
+        record_rows.append((
+            record_internal_id,
+            record_metadata['filename'], record_metadata['record_id'],
+            record_metadata['byte_start'], record_metadata['byte_end'],
+            record_metadata['feature_count'], record_metadata['product'],
+            record_metadata['organism'], record_metadata['description'],
+            record_metadata['protocluster_count'], record_metadata['proto_core_count'],
+            record_metadata['pfam_domain_count'], record_metadata['cds_count'],
+            record_metadata['cand_cluster_count'],
+            json.dumps(record_metadata['cluster_types']) if record_metadata['cluster_types'] else None
+        ))
+        attribute_rows.extend((record_internal_id,) + attribute[1:] for attribute in attributes)
+    return record_rows, attribute_rows
+
+
+def _insert_rows(conn: sqlite3.Connection, record_rows: List[tuple], attribute_rows: List[tuple]) -> None:
+    """Insert records and then their attributes."""
+    conn.executemany(
+        """INSERT INTO records 
+           (id, filename, record_id, byte_start, byte_end, feature_count, product, organism, description,
+            protocluster_count, proto_core_count, pfam_domain_count, cds_count, cand_cluster_count,
+            cluster_types)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        record_rows
+    )
+    conn.executemany(
+        """INSERT INTO attributes 
+           (record_ref, origin, attribute_name, attribute_value)
+           VALUES (?, ?, ?, ?)""",
+        attribute_rows
+    )
+
+
+def insert_parsed_files(
+    conn: sqlite3.Connection,
+    parsed_files: List[Tuple[Path, List[Tuple[Dict[str, Any], List[tuple]]]]],
+    next_record_id: int
+) -> List[Tuple[int, int]]:
+    """
+    Insert the records of several parsed files with one executemany call per table.
+    
+    If the batch fails, the files are inserted one at a time instead so only
+    the files that fail are left out; no part of a failed file is kept.
+    
+    Args:
+        conn: Database connection with an open transaction
+        parsed_files: (path, parsed records) of each file, in insertion order
+        next_record_id: Internal ID given to the first inserted record
+        
+    Returns:
+        (record count, attribute count) of each inserted file
+    """
+    record_rows: List[tuple] = []
+    attribute_rows: List[tuple] = []
+    counts = []
+    for _, parsed in parsed_files:
+        file_records, file_attributes = build_insert_rows(parsed, next_record_id + len(record_rows))
+        record_rows.extend(file_records)
+        attribute_rows.extend(file_attributes)
+        counts.append((len(file_records), len(file_attributes)))
+    
+    conn.execute("SAVEPOINT batch")
+    try:
+        _insert_rows(conn, record_rows, attribute_rows)
+        return counts
+    except sqlite3.Error:
+        conn.execute("ROLLBACK TO batch")
+    finally:
+        conn.execute("RELEASE batch")
+    
+    counts = []
+    for json_file, parsed in parsed_files:
+        file_records, file_attributes = build_insert_rows(parsed, next_record_id)
+        conn.execute("SAVEPOINT file")
+        try:
+            _insert_rows(conn, file_records, file_attributes)
+        except sqlite3.Error as e:
+            # Don't keep part of a file that failed to insert
+            conn.execute("ROLLBACK TO file")
+            print(f"Error processing {json_file.name}: {e}")
+            continue
+        finally:
+            conn.execute("RELEASE file")
+        next_record_id += len(file_records)
+        counts.append((len(file_records), len(file_attributes)))
+    return counts
+
+
 def preprocess_antismash_files(
     input_directory: str,
     index_path: str,
     progress_callback: Optional[Callable[[str, int, int], None]] = None,
-    json_files: Optional[List[Path]] = None
+    json_files: Optional[List[Path]] = None,
+    max_workers: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Preprocess antiSMASH JSON files and store attributes in SQLite database.
@@ -289,6 +766,7 @@ def preprocess_antismash_files(
         index_path: Full path to the index database file
         progress_callback: Optional callback function called with (current_file, files_processed, total_files)
         json_files: Optional list of specific JSON file paths to process. If None, all files in directory are processed.
+        max_workers: Maximum number of processes parsing files; defaults to the number of CPUs
         
     Returns:
         Dict with processing statistics
@@ -310,146 +788,94 @@ def preprocess_antismash_files(
     data_root = str(input_path.absolute())
     populate_metadata_table(conn, data_root)
     
+    # The database is rebuilt from scratch if preprocessing fails, so skip the
+    # fsyncs and the on-disk rollback journal. These settings only last as long
+    # as this connection.
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = MEMORY")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute(f"PRAGMA cache_size = -{WRITE_CACHE_SIZE_KIB}")
+    # Nobody reads the database before it is complete
+    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+    
     # Determine which files to process
     if json_files is not None:
         # Use the provided list of files
         files_to_process = json_files
     else:
-        # Process first 5000 JSON files only - scan recursively in subdirectories
-        files_to_process = list(input_path.rglob("*.json"))[:5000]
-    
+        # Process first 5000 JSON files only - scan recursively in subdirectories,
+        # stopping as soon as enough files are found
+        try:
+            files_to_process = [Path(entry.path) for entry in islice(iter_json_entries(str(input_path)), 5000)]
+        except OSError:
+            files_to_process = []
+    
+    # Records parsed so far, including those of files that fail to insert; only
+    # used to number the records without an id
+    parsed_records = 0
     total_records = 0
     total_attributes = 0
     files_processed = 0
+    indexed_files = 0
+    next_record_id = 1
+    pending_files: List[Tuple[Path, List[Tuple[Dict[str, Any], List[tuple]]]]] = []
+    pending_rows = 0
+    
+    def flush_pending_files():
+        nonlocal next_record_id, total_records, total_attributes, indexed_files, files_processed, pending_rows
+        inserted = insert_parsed_files(conn, pending_files, next_record_id)
+        for record_count, attribute_count in inserted:
+            next_record_id += record_count
+            total_records += record_count
+            total_attributes += attribute_count
+            indexed_files += 1
+        # Queued files were already counted as processed; take back the ones that failed to insert
+        files_processed -= len(pending_files) - len(inserted)
+        pending_files.clear()
+        pending_rows = 0
     
     try:
-        for json_file in files_to_process:
+        # All files are inserted in a single transaction, committed at the end
+        conn.execute("BEGIN")
+        for json_file, parsed in parse_antismash_files(files_to_process, input_path, max_workers):
             try:
                 if progress_callback:
                     relative_path = json_file.relative_to(input_path)
                     progress_callback(str(relative_path), files_processed, len(files_to_process))
                 
-                file_attributes: List[tuple] = []
-                file_records = 0
+                if isinstance(parsed, Exception):
+                    raise parsed
                 
-                # Parse file to extract both attributes and byte positions
-                with open(json_file, 'rb') as f:
-                    # Read entire file content to track byte positions
-                    content = f.read()
-                    
-                    # Find the records array boundaries
-                    records_start_pattern = b'"records"'
-                    records_pos = content.find(records_start_pattern)
-                    
-                    if records_pos != -1:
-                        # Find the opening bracket of records array
-                        bracket_pos = content.find(b'[', records_pos)
-                        
-                        if bracket_pos != -1:
-                            # Parse individual records and track their byte positions
-                            pos = bracket_pos + 1  # Start after opening bracket
-                            brace_count = 0
-                            record_start = None
-                            
-                            file_record_data = []
-                            
-                            while pos < len(content):
-                                char = content[pos:pos+1]
-                                
-                                if char == b'{':
-                                    if brace_count == 0:
-                                        record_start = pos
-                                    brace_count += 1
-                                elif char == b'}':
-                                    brace_count -= 1
-                                    if brace_count == 0 and record_start is not None:
-                                        # Found complete record
-                                        record_end = pos + 1
-                                        
-                                        # Parse the record JSON
-                                        record_json = content[record_start:record_end]
-                                        try:
-                                            import json
-                                            record = json.loads(record_json.decode('utf-8'))
-                                            record_id = record.get('id', f'record_{total_records}')
-                                            
-                                            # Extract record metadata - use relative path to avoid filename collisions
-                                            relative_path = json_file.relative_to(input_path)
-                                            metadata = extract_record_metadata(
-                                                record, str(relative_path), record_id, record_start, record_end
-                                            )
-                                            file_record_data.append(metadata)
-                                            
-                                            file_records += 1
-                                            total_records += 1
-                                            
-                                        except (json.JSONDecodeError, UnicodeDecodeError):
-                                            # Skip malformed records
-                                            pass
-                                        
-                                        record_start = None
-                                elif char == b']' and brace_count == 0:
-                                    # End of records array
-                                    break
-                                
-                                pos += 1
-                
-                # Insert records and then attributes
-                if file_record_data:
-                    # Insert records first
-                    for record_metadata in file_record_data:
-                        cursor = conn.execute(
-                            """INSERT INTO records 
-                               (filename, record_id, byte_start, byte_end, feature_count, product, organism, description,
-                                protocluster_count, proto_core_count, pfam_domain_count, cds_count, cand_cluster_count)
-                               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                            (record_metadata['filename'], record_metadata['record_id'], 
-                             record_metadata['byte_start'], record_metadata['byte_end'],
-                             record_metadata['feature_count'], record_metadata['product'],
-                             record_metadata['organism'], record_metadata['description'],
-                             record_metadata['protocluster_count'], record_metadata['proto_core_count'],
-                             record_metadata['pfam_domain_count'], record_metadata['cds_count'],
-                             record_metadata['cand_cluster_count'])
-                        )
-                        record_internal_id = cursor.lastrowid
-                        
-                        # Skip if we couldn't get the record ID
-                        if record_internal_id is None:
-                            continue
-                        
-                        # Now parse the record again to extract attributes
-                        record_start = record_metadata['byte_start']
-                        record_end = record_metadata['byte_end']
-                        record_json = content[record_start:record_end]
-                        
-                        try:
-                            import json
-                            record = json.loads(record_json.decode('utf-8'))
-                            
-                            # Extract attributes using the internal record ID
-                            attributes = extract_attributes_from_record(record, record_internal_id)
-                            
-                            # Insert attributes for this record
-                            if attributes:
-                                conn.executemany(
-                                    """INSERT INTO attributes 
-                                       (record_ref, origin, attribute_name, attribute_value)
-                                       VALUES (?, ?, ?, ?)""",
-                                    attributes
-                                )
-                                total_attributes += len(attributes)
-                        
-                        except (json.JSONDecodeError, UnicodeDecodeError):
-                            # Skip malformed records
-                            pass
-                    
-                    conn.commit()
+                for record_metadata, attributes in parsed:
+                    if record_metadata['record_id'] is None:
+                        record_metadata['record_id'] = f'record_{parsed_records}'
+                    parsed_records += 1
                 
+                if parsed:
+                    pending_files.append((json_file, parsed))
+                    pending_rows += len(parsed) + sum(len(attributes) for _, attributes in parsed)
+                # Counted once parsed, so progress doesn't wait for the batch to be inserted
                 files_processed += 1
                 
             except Exception as e:
                 # Log error but continue with other files
                 print(f"Error processing {json_file.name}: {e}")
+            
+            # Small files are inserted together so each executemany call covers many rows
+            if pending_rows >= INSERT_BATCH_ROWS:
+                flush_pending_files()
+        
+        flush_pending_files()
+        
+        # Store the index stats so opening the database doesn't need to count them
+        conn.executemany(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            [('indexed_files', str(indexed_files)), ('total_records', str(total_records))]
+        )
+        conn.commit()
+        
+        create_attributes_indexes(conn)
+        build_search_index(conn)
     
     finally:
         # Final progress callback
@@ -463,3 +889,57 @@ def preprocess_antismash_files(
         'total_attributes': total_attributes,
         'database_path': str(db_path)
     }
+
+
+def run_preprocessing_worker(
+    input_directory: str,
+    index_path: str,
+    json_files: Optional[List[Path]],
+    status_queue: Any,
+    update_interval: float = 0.0
+) -> None:
+    """
+    Run preprocess_antismash_files as the target of a separate process.
+    
+    Preprocessing runs outside the web server process so it doesn't hold the
+    server's GIL. Status changes are put on status_queue as dicts of changed
+    fields; the last one always has is_running set to False.
+    
+    Args:
+        input_directory: Directory containing JSON files to process
+        index_path: Full path to the index database file
+        json_files: Optional list of specific JSON file paths to process
+        status_queue: multiprocessing queue receiving the status changes
+        update_interval: Minimum number of seconds between progress updates;
+            the first and final ones are always sent
+    """
+    last_update = None
+    
+    def progress_callback(current_file, files_processed, total_files):
+        nonlocal last_update
+        now = time.monotonic()
+        if (last_update is not None and now - last_update < update_interval
+                and files_processed < total_files):
+            return
+        last_update = now
+        status_queue.put({
+            'current_file': current_file,
+            'files_processed': files_processed,
+            'total_files': total_files
+        })
+    
+    try:
+        results = preprocess_antismash_files(input_directory, index_path, progress_callback, json_files)
+        status_queue.put({
+            'is_running': False,
+            'status': 'completed',
+            'current_file': None,
+            'files_processed': results['files_processed'],
+            'total_files': results['files_processed']  # Final count
+        })
+    except Exception as e:
+        status_queue.put({
+            'is_running': False,
+            'status': 'error',
+            'error_message': str(e)
+        })
@@ -0,0 +1,150 @@
+"""
+Lookup structures for the records of a loaded entry.
+Built once per cached entry so the record endpoints don't rescan all features.
+"""
+
+import sys
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .file_utils import match_location
+
+
+class RegionInfo(NamedTuple):
+    """Qualifiers of a region feature, extracted once when its record is indexed."""
+    id: str
+    region_number: str
+    location: Optional[str]
+    start: Optional[int]
+    end: Optional[int]
+    product: Tuple[Any, ...]
+    rules: Tuple[Any, ...]
+
+
+def build_region_info(feature: Dict[str, Any]) -> RegionInfo:
+    """
+    Extract the qualifiers of a region feature.
+
+    Args:
+        feature: A feature of type 'region'
+
+    Returns:
+        RegionInfo; start and end are None if the location can't be parsed
+    """
+    qualifiers = feature.get("qualifiers") or {}
+    region_number = sys.intern(str((qualifiers.get("region_number") or ["unknown"])[0]))
+    location = feature.get("location")
+    start, end = match_location(location or "") or (None, None)
+    return RegionInfo(
+        id=f"region_{region_number}",
+        region_number=region_number,
+        location=location,
+        start=start,
+        end=end,
+        product=tuple(qualifiers.get("product", ["unknown"])),
+        rules=tuple(qualifiers.get("rules", [])),
+    )
+
+
+def build_record_index(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build lookup structures for a single record.
+
+    Args:
+        record: The record dictionary
+
+    Returns:
+        Dictionary with:
+            record: The record itself
+            by_type: feature type -> list of features of that type in record order
+            regions: region_id -> RegionInfo, first match wins
+            region_infos: RegionInfo of every region feature in record order
+            starts, ends, positions, features: parallel lists of all
+                non-region features with a parsable location, sorted by start
+                coordinate; positions holds each feature's index in record['features']
+            max_ends: running maximum of ends, so every feature before the first
+                max_ends value >= x ends before x
+            intervals_by_type: feature type -> dict with the same five lists,
+                restricted to features of that type
+    """
+    regions: Dict[str, RegionInfo] = {}
+    region_infos = []
+    located = []
+    by_type: Dict[Any, List[Dict[str, Any]]] = {}
+
+    for position, feature in enumerate(record.get("features", [])):
+        by_type.setdefault(feature.get("type"), []).append(feature)
+        if feature.get("type") == "region":
+            region_info = build_region_info(feature)
+            region_infos.append(region_info)
+            regions.setdefault(region_info.id, region_info)
+            continue
+
+        coordinates = match_location(feature.get("location", ""))
+        if coordinates is None:
+            continue
+        located.append((coordinates[0], coordinates[1], position, feature))
+
+    located.sort(key=lambda item: (item[0], item[2]))
+
+    located_by_type: Dict[Any, List[tuple]] = {}
+    for item in located:
+        located_by_type.setdefault(item[3].get("type"), []).append(item)
+
+    return {
+        "record": record,
+        "by_type": by_type,
+        "regions": regions,
+        "region_infos": region_infos,
+        **_build_intervals(located),
+        "intervals_by_type": {
+            feature_type: _build_intervals(items)
+            for feature_type, items in located_by_type.items()
+        },
+    }
+
+
+def _build_intervals(located: List[tuple]) -> Dict[str, list]:
+    """Split (start, end, position, feature) tuples sorted by start into parallel lists."""
+    ends = [item[1] for item in located]
+    return {
+        "starts": [item[0] for item in located],
+        "ends": ends,
+        "max_ends": list(accumulate(ends, max)),
+        "positions": [item[2] for item in located],
+        "features": [item[3] for item in located],
+    }
+
+
+def find_overlapping_features(index: Dict[str, Any], start: int, end: int,
+                              feature_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Find features overlapping the range [start, end] (partial overlaps included).
+
+    Args:
+        index: Record index from build_record_index
+        start: Range start coordinate
+        end: Range end coordinate
+        feature_type: Optional feature type to filter on
+
+    Returns:
+        Matching features in their original record order
+    """
+    if feature_type:
+        # Scan only the features of the requested type instead of filtering all of them
+        index = index["intervals_by_type"].get(feature_type)
+        if index is None:
+            return []
+
+    # Features are sorted by start, so everything after this bound starts past the range
+    upper = bisect_right(index["starts"], end)
+    # ...and no feature before this bound reaches the start of the range
+    lower = bisect_left(index["max_ends"], start, 0, upper)
+    ends = index["ends"]
+    features = index["features"]
+    matches = [i for i in range(lower, upper) if ends[i] >= start]
+
+    positions = index["positions"]
+    matches.sort(key=positions.__getitem__)
+    return [features[i] for i in matches]
@@ -26,6 +26,76 @@ def test_404_handler(client):
     assert 'error' in data
 
 
+def test_hashed_assets_are_cached(client, tmp_path, monkeypatch):
+    """Hashed bundles get long-lived cache headers, index.html does not."""
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'index-3f2a9c1b.js').write_text('console.log(1);')
+    (tmp_path / 'index.html').write_text('<title>BGC Viewer</title>')
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+
+    response = client.get('/assets/index-3f2a9c1b.js')
+    assert response.status_code == 200
+    assert response.cache_control.max_age == 60 * 60 * 24 * 30
+    assert response.cache_control.immutable
+
+    response = client.get('/index.html')
+    assert response.status_code == 200
+    assert not response.cache_control.max_age
+
+
+def test_precompressed_assets(client, tmp_path, monkeypatch):
+    """Precompressed variants are sent to clients that accept their encoding."""
+    import gzip
+
+    (tmp_path / 'assets').mkdir()
+    bundle = tmp_path / 'assets' / 'index-3f2a9c1b.js'
+    bundle.write_text('console.log(1);')
+    (tmp_path / 'assets' / 'index-3f2a9c1b.js.gz').write_bytes(gzip.compress(bundle.read_bytes()))
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+
+    response = client.get('/assets/index-3f2a9c1b.js', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype in ('text/javascript', 'application/javascript')
+    assert gzip.decompress(response.data) == b'console.log(1);'
+    response.close()
+
+    response = client.get('/assets/index-3f2a9c1b.js')
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'console.log(1);'
+    response.close()
+
+
+def test_file_responses_are_not_compressed_on_the_fly(client, tmp_path, monkeypatch):
+    """Files without a precompressed variant are passed through as they are."""
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'index-3f2a9c1b.js').write_text('console.log(1);' * 1000)
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+
+    response = client.get('/assets/index-3f2a9c1b.js', headers={'Accept-Encoding': 'br, gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == b'console.log(1);' * 1000
+    response.close()
+
+    monkeypatch.setitem(app.config, 'USE_X_SENDFILE', True)
+    response = client.get('/assets/index-3f2a9c1b.js', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['X-Sendfile'] == str(tmp_path / 'assets' / 'index-3f2a9c1b.js')
+    assert 'Content-Encoding' not in response.headers
+    response.close()
+
+
+def test_version(client):
+    """Test the version endpoint."""
+    from bgc_viewer import __version__
+
+    response = client.get('/api/version')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {"version": __version__, "name": "BGC Viewer"}
+
+    response = client.get('/api/version', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
 def test_cors_headers(client):
     """Test that CORS headers are present."""
     # Include an Origin header to trigger CORS response
@@ -33,3 +103,246 @@ def test_cors_headers(client):
     assert response.status_code == 200
     # Flask-CORS should add these headers when Origin is present
     assert 'Access-Control-Allow-Origin' in response.headers
+
+
+def test_browse_lists_directories_and_data_files(client, tmp_path):
+    """Test that /api/browse lists subdirectories, JSON and database files."""
+    (tmp_path / "subdir").mkdir()
+    (tmp_path / "b.json").write_text("{}")
+    (tmp_path / "a.db").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    response = client.get('/api/browse', query_string={'path': str(tmp_path)})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    items = {item["name"]: item for item in data["items"]}
+    assert items["subdir"]["type"] == "directory"
+    assert items["b.json"]["type"] == "file"
+    assert items["b.json"]["size"] == 2
+    assert items["a.db"]["type"] == "database"
+    assert "notes.txt" not in items
+    # Parent entry first, then entries sorted by name
+    assert [item["name"] for item in data["items"]] == ["..", "a.db", "b.json", "subdir"]
+
+
+def test_scan_folder_finds_nested_json_files(client, tmp_path):
+    """Test that /api/scan-folder recursively finds JSON files."""
+    nested = tmp_path / "nested" / "deeper"
+    nested.mkdir(parents=True)
+    (tmp_path / "top.json").write_text("{}")
+    (nested / "inner.json").write_text("[]")
+    (tmp_path / "nested" / "skip.txt").write_text("")
+
+    response = client.post('/api/scan-folder', json={'path': str(tmp_path)})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+
+    assert data["count"] == 2
+    assert [f["relative_path"] for f in data["json_files"]] == [
+        "nested/deeper/inner.json",
+        "top.json",
+    ]
+    inner, top = data["json_files"]
+    assert inner["directory"] == "nested/deeper"
+    assert inner["size"] == 2
+    assert top["directory"] == "."
+    assert top["path"] == str(tmp_path / "top.json")
+
+
+def test_preprocess_folder_reports_progress(client, tmp_path):
+    """Background preprocessing publishes its status until completion."""
+    import time
+
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for i in range(3):
+        (data_dir / f"entry_{i}.json").write_text(json.dumps({"records": [{"id": f"rec{i}", "features": []}]}))
+
+    response = client.post('/api/preprocess-folder', json={
+        'path': str(data_dir), 'index_path': str(tmp_path / "attributes.db")
+    })
+    assert response.status_code == 200
+    assert response.get_json()["total_files"] == 3
+
+    deadline = time.monotonic() + 10
+    status = client.get('/api/preprocessing-status').get_json()
+    while status["is_running"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+        status = client.get('/api/preprocessing-status').get_json()
+
+    assert status["status"] == "completed"
+    assert status["files_processed"] == 3
+
+
+def test_preprocessing_status_stream(client, tmp_path):
+    """The status stream sends status events until preprocessing stops."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "entry.json").write_text(json.dumps({"records": [{"id": "rec", "features": []}]}))
+
+    response = client.post('/api/preprocess-folder', json={
+        'path': str(data_dir), 'index_path': str(tmp_path / "attributes.db")
+    })
+    assert response.status_code == 200
+
+    response = client.get('/api/preprocessing-status/stream')
+    assert response.mimetype == 'text/event-stream'
+    events = [json.loads(line[len("data: "):])
+              for line in response.get_data(as_text=True).split("\n\n") if line.startswith("data: ")]
+
+    assert events[-1]["status"] == "completed"
+    assert events[-1]["files_processed"] == 1
+    assert all(event["is_running"] for event in events[:-1])
+
+
+@pytest.fixture
+def loaded_client(client, tmp_path):
+    """Test client with a preprocessed database selected and an entry loaded."""
+    from bgc_viewer.preprocessing import preprocess_antismash_files
+
+    data = {
+        "version": "1.0",
+        "records": [{
+            "id": "rec1",
+            "description": "Record with a region",
+            "features": [
+                {"type": "region", "location": "[100:1000]",
+                 "qualifiers": {"region_number": ["1"], "product": ["NRPS"], "rules": ["rule"]}},
+                {"type": "CDS", "location": "[50:150](-)", "qualifiers": {"locus_tag": ["edge"]}},
+                {"type": "gene", "location": "[200:300](+)", "qualifiers": {"gene": ["inner"]}},
+                {"type": "CDS", "location": "[1500:1800](+)", "qualifiers": {"locus_tag": ["outside"]}},
+            ]
+        }]
+    }
+    (tmp_path / "entry.json").write_text(json.dumps(data))
+    index_path = str(tmp_path / "attributes.db")
+    preprocess_antismash_files(str(tmp_path), index_path)
+
+    assert client.post('/api/select-database', json={'path': index_path}).status_code == 200
+    assert client.post('/api/load-entry', json={'id': 'entry.json:rec1'}).status_code == 200
+    return client
+
+
+def test_status_with_loaded_entry(loaded_client, tmp_path):
+    """Status reports the data root of the selected database."""
+    data = loaded_client.get('/api/status').get_json()
+    assert data["has_loaded_data"] is True
+    assert data["current_data_directory"] == str(tmp_path)
+
+
+def test_record_regions(loaded_client):
+    """Test listing the regions of a loaded record."""
+    response = loaded_client.get('/api/records/rec1/regions')
+    assert response.status_code == 200
+    regions = json.loads(response.data)["regions"]
+    assert len(regions) == 1
+    assert regions[0]["id"] == "region_1"
+    assert regions[0]["start"] == 100
+    assert regions[0]["end"] == 1000
+
+
+def test_record_responses_are_revalidated(loaded_client):
+    """Record responses carry an ETag and unchanged ones are answered with 304."""
+    response = loaded_client.get('/api/records/rec1/regions')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    response = loaded_client.get('/api/records/rec1/regions', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    # Compressed responses have the encoding appended to their ETag
+    response = loaded_client.get('/api/records/rec1/features', headers={'Accept-Encoding': 'br'})
+    compressed_etag = response.headers['ETag']
+    assert compressed_etag.endswith(':br"')
+    response.close()
+    response = loaded_client.get('/api/records/rec1/features', headers={
+        'Accept-Encoding': 'br', 'If-None-Match': compressed_etag
+    })
+    assert response.status_code == 304
+
+    response = loaded_client.get('/api/records/rec1/regions', headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+
+    response = loaded_client.get('/api/records/missing/regions', headers={'If-None-Match': etag})
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+
+def test_record_etag_survives_cache_rebuild(loaded_client):
+    """The ETag depends on the source file, so another worker or a rebuilt cache still answers 304."""
+    from bgc_viewer.app import load_cached_index
+
+    etag = loaded_client.get('/api/records/rec1/regions').headers['ETag']
+    load_cached_index.cache_clear()
+
+    response = loaded_client.get('/api/records/rec1/regions', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_region_features(loaded_client):
+    """Test getting the features overlapping a region."""
+    response = loaded_client.get('/api/records/rec1/regions/region_1/features')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["region_boundaries"] == {"start": 100, "end": 1000}
+    assert data["count"] == 2
+    assert [f["location"] for f in data["features"]] == ["[50:150](-)", "[200:300](+)"]
+
+    response = loaded_client.get('/api/records/rec1/regions/region_1/features?type=gene')
+    assert json.loads(response.data)["count"] == 1
+
+    assert loaded_client.get('/api/records/rec1/regions/region_9/features').status_code == 404
+    assert loaded_client.get('/api/records/missing/regions/region_1/features').status_code == 404
+
+
+def test_large_responses_are_compressed(client, tmp_path):
+    """JSON responses above the size threshold are compressed when the client accepts it."""
+    for i in range(100):
+        (tmp_path / f"antismash_result_{i:03d}.json").write_text("{}")
+
+    response = client.get(f'/api/browse?path={tmp_path}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+    response = client.get('/api/version', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_record_features(loaded_client):
+    """Test getting all features of a record with type filter and limit."""
+    data = json.loads(loaded_client.get('/api/records/rec1/features').data)
+    assert data["count"] == 4
+
+    data = json.loads(loaded_client.get('/api/records/rec1/features?type=CDS&limit=1').data)
+    assert data["count"] == 1
+    assert data["features"][0]["qualifiers"]["locus_tag"] == ["edge"]
+    assert "total" not in data
+
+
+def test_record_features_streamed_in_chunks(loaded_client, monkeypatch):
+    """Feature lists split over several chunks still form one JSON document."""
+    monkeypatch.setattr(app.json, 'stream_chunk_size', 3)
+
+    response = loaded_client.get('/api/records/rec1/features')
+    assert response.is_streamed
+    data = json.loads(response.data)
+    assert data["count"] == 4
+    assert [f["type"] for f in data["features"]] == ["region", "CDS", "gene", "CDS"]
+
+
+def test_record_features_pagination(loaded_client):
+    """Feature lists are paginated only when page or per_page is given."""
+    data = json.loads(loaded_client.get('/api/records/rec1/features?page=2&per_page=3').data)
+    assert (data["page"], data["per_page"], data["total"], data["count"]) == (2, 3, 4, 1)
+    assert data["features"][0]["qualifiers"]["locus_tag"] == ["outside"]
+
+    data = json.loads(loaded_client.get('/api/records/rec1/regions/region_1/features?per_page=1').data)
+    assert (data["page"], data["total"], data["count"]) == (1, 2, 1)
+
+
+def test_record_endpoints_unknown_record(loaded_client):
+    """Record endpoints return 404 for a record that isn't in the entry."""
+    assert loaded_client.get('/api/records/missing/features').status_code == 404
+    assert loaded_client.get('/api/records/missing/tta-codons').status_code == 404
+    assert loaded_client.get('/api/records/rec1/tta-codons').get_json()['count'] == 0
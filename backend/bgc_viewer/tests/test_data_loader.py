@@ -11,7 +11,9 @@ from bgc_viewer.data_loader import (
     load_specific_record_fallback,
     list_available_records,
     get_record_metadata_from_index,
-    load_json_file
+    load_json_file,
+    loads_json,
+    iter_records
 )
 
 
@@ -47,6 +49,42 @@ class TestRandomAccess:
         loaded_data = load_specific_record(str(sample_json_file), "nonexistent_record", str(temp_dir))
         assert loaded_data is None
     
+    def test_fallback_invalid_json(self, temp_dir):
+        """Test that the fallback reports files that aren't valid JSON."""
+        broken_file = temp_dir / "broken.json"
+        broken_file.write_text('{"records": [')
+        with pytest.raises(json.JSONDecodeError):
+            load_specific_record_fallback(str(broken_file), "test_record_1")
+        
+        empty_file = temp_dir / "empty.json"
+        empty_file.write_text("")
+        with pytest.raises(json.JSONDecodeError):
+            load_specific_record_fallback(str(empty_file), "test_record_1")
+    
+    def test_fallback_with_nan_values(self, temp_dir):
+        """Test the fallback on files with NaN literals, which the streaming parser rejects."""
+        nan_file = temp_dir / "nan.json"
+        nan_file.write_text(json.dumps({"records": [{"id": "rec", "score": float("nan")}]}))
+        loaded_data = load_specific_record_fallback(str(nan_file), "rec")
+        assert loaded_data["records"][0]["id"] == "rec"
+    
+    def test_loaded_records_are_cached_per_file_version(self, temp_dir):
+        """Test that loaded records are reused until the file changes."""
+        data_file = temp_dir / "cached.json"
+        data_file.write_text(json.dumps({"records": [{"id": "rec", "description": "first"}]}))
+        first = load_specific_record(str(data_file), "rec", str(temp_dir))
+        assert load_specific_record(str(data_file), "rec", str(temp_dir)) is first
+        
+        data_file.write_text(json.dumps({"records": [{"id": "rec", "description": "second version"}]}))
+        reloaded = load_specific_record(str(data_file), "rec", str(temp_dir))
+        assert reloaded["records"][0]["description"] == "second version"
+    
+    def test_iter_records(self, sample_json_file):
+        """Test lazily iterating over the records of a file."""
+        records = iter_records(str(sample_json_file))
+        assert next(records)["id"] == "test_record_1"
+        assert [record["id"] for record in records] == ["test_record_2"]
+    
     def test_list_available_records(self, processed_data_dir):
         """Test listing available records from index."""
         temp_dir, result = processed_data_dir
@@ -86,6 +124,23 @@ class TestDataLoading:
         assert "records" in data
         assert len(data["records"]) == 2
         assert data["version"] == "1.0"
+    
+    def test_load_large_json_file(self, temp_dir, monkeypatch):
+        """Test that files over the in-memory limit are streamed through ijson."""
+        monkeypatch.setattr("bgc_viewer.data_loader.IN_MEMORY_PARSE_LIMIT", 0)
+        json_file = temp_dir / "large.json"
+        json_file.write_text(json.dumps({"version": "1.0", "records": [{"id": "rec1"}]}))
+        
+        data = load_json_file(json_file)
+        
+        assert data == {"version": "1.0", "records": [{"id": "rec1"}]}
+    
+    def test_loads_json(self):
+        """Test decoding JSON bytes, including NaN literals written by json.dump."""
+        assert loads_json(b'{"id": "rec", "start": 1}') == {"id": "rec", "start": 1}
+        assert loads_json(b'{"score": NaN}')["score"] != 0
+        with pytest.raises(json.JSONDecodeError):
+            loads_json(b'{"id": ')
 
 
 class TestPerformanceComparison:
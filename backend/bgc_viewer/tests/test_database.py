@@ -0,0 +1,83 @@
+"""
+Tests for database metadata lookups.
+"""
+
+import sqlite3
+
+import pytest
+
+from bgc_viewer.database import POOL_READ_CONNECTIONS, get_database_info, get_read_connection
+
+
+class TestDatabaseInfo:
+    """Tests for get_database_info."""
+
+    def test_reads_metadata_and_stats(self, processed_data_dir):
+        temp_dir, result = processed_data_dir
+        info = get_database_info(temp_dir / "attributes.db")
+
+        assert info["data_root"] == str(temp_dir)
+        assert info["index_stats"]["total_records"] == result["total_records"]
+        assert info["index_stats"]["indexed_files"] == 1
+
+    def test_counts_stats_missing_from_metadata(self, processed_data_dir):
+        temp_dir, result = processed_data_dir
+        db_path = temp_dir / "attributes.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM metadata WHERE key IN ('indexed_files', 'total_records')")
+        conn.commit()
+        conn.close()
+
+        info = get_database_info(db_path)
+
+        assert info["index_stats"] == {"indexed_files": 1, "total_records": result["total_records"]}
+
+    def test_missing_file(self, temp_dir):
+        info = get_database_info(temp_dir / "missing.db")
+        assert info == {"error": "Database file does not exist"}
+
+    def test_not_a_database_file(self, temp_dir):
+        (temp_dir / "folder.db").mkdir()
+        (temp_dir / "data.json").write_text("{}")
+
+        assert get_database_info(temp_dir / "folder.db") == {"error": "Path is not a database file"}
+        assert get_database_info(temp_dir / "data.json") == {"error": "Path is not a database file"}
+
+    def test_rewritten_database_is_reread(self, processed_data_dir):
+        temp_dir, _ = processed_data_dir
+        db_path = temp_dir / "attributes.db"
+        get_database_info(db_path)
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE metadata SET value = 'changed' WHERE key = 'data_root'")
+        conn.execute("INSERT INTO metadata (key, value) VALUES ('padding', ?)", ("x" * 10000,))
+        conn.commit()
+        conn.close()
+
+        assert get_database_info(db_path)["data_root"] == "changed"
+
+
+class TestReadConnections:
+    """Tests for the pooled read-only connections."""
+
+    def test_connection_is_read_only(self, processed_data_dir):
+        temp_dir, _ = processed_data_dir
+        conn = get_read_connection(temp_dir / "attributes.db")
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM records")
+
+    @pytest.mark.skipif(not POOL_READ_CONNECTIONS, reason="connections are not pooled")
+    def test_connection_reused_until_file_replaced(self, processed_data_dir):
+        temp_dir, _ = processed_data_dir
+        db_path = temp_dir / "attributes.db"
+        conn = get_read_connection(db_path)
+        assert get_read_connection(db_path) is conn
+
+        replacement = temp_dir / "replacement.db"
+        sqlite3.connect(replacement).close()
+        replacement.replace(db_path)
+        assert get_read_connection(db_path) is not conn
+
+    def test_missing_database(self, temp_dir):
+        with pytest.raises(OSError):
+            get_read_connection(temp_dir / "missing.db")
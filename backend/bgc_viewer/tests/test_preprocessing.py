@@ -10,7 +10,11 @@ from bgc_viewer.preprocessing import (
     preprocess_antismash_files,
     flatten_complex_value,
     extract_attributes_from_record,
-    create_attributes_database
+    create_attributes_database,
+    iter_record_spans,
+    parse_antismash_file,
+    parse_antismash_content,
+    prefetch_file_contents
 )
 
 
@@ -117,6 +121,77 @@ class TestDatabaseCreation:
         conn.close()
 
 
+class TestPrefetchFileContents:
+    """Tests for the background file reader."""
+    
+    def test_yields_contents_in_order(self, temp_dir):
+        files = []
+        for i in range(10):
+            path = temp_dir / f"file_{i}.json"
+            path.write_bytes(f"content {i}".encode())
+            files.append(path)
+        
+        results = list(prefetch_file_contents(files, depth=2))
+        
+        assert [path for path, _ in results] == files
+        assert [content for _, content in results] == [f"content {i}".encode() for i in range(10)]
+    
+    def test_read_errors_are_yielded(self, temp_dir):
+        missing = temp_dir / "missing.json"
+        
+        (path, content), = list(prefetch_file_contents([missing]))
+        
+        assert path == missing
+        assert isinstance(content, FileNotFoundError)
+    
+    def test_consumer_can_stop_early(self, temp_dir):
+        files = []
+        for i in range(10):
+            path = temp_dir / f"file_{i}.json"
+            path.write_bytes(b"{}")
+            files.append(path)
+        
+        reader = prefetch_file_contents(files, depth=1)
+        next(reader)
+        reader.close()
+
+
+class TestIterRecordSpans:
+    """Tests for locating records in the raw file contents."""
+    
+    def test_spans_of_records(self):
+        records = [
+            {"id": "a", "note": "braces { in } strings", "nested": {"list": [{"x": 1}]}},
+            {"id": "b", "note": 'escaped \\" quote ] and }'},
+        ]
+        content = json.dumps({"version": "1.0", "records": records, "after": {"x": 1}}).encode()
+        
+        spans = list(iter_record_spans(content))
+        
+        assert [json.loads(content[start:end]) for start, end in spans] == records
+    
+    def test_truncated_file(self):
+        content = b'{"records": [{"id": "a"}, {"id": "b", "note": "unterminated'
+        
+        assert [content[start:end] for start, end in iter_record_spans(content)] == [b'{"id": "a"}']
+    
+    def test_no_records(self):
+        assert list(iter_record_spans(b'{"version": "1.0"}')) == []
+    
+    def test_mapped_file_matches_contents(self, temp_dir):
+        """Test that a file read through a memory map parses like its contents."""
+        records = [{"id": "a", "features": [{"type": "source", "qualifiers": {"organism": ["Test organism"]}}]}]
+        json_file = temp_dir / "file.json"
+        json_file.write_text(json.dumps({"records": records}))
+        (temp_dir / "empty.json").write_bytes(b"")
+        
+        parsed = parse_antismash_file(json_file, temp_dir)
+        
+        assert parsed == parse_antismash_content(json_file.read_bytes(), "file.json")
+        assert [metadata['record_id'] for metadata, _ in parsed] == ["a"]
+        assert parse_antismash_file(temp_dir / "empty.json", temp_dir) == []
+
+
 class TestPreprocessingPipeline:
     """Tests for the complete preprocessing pipeline."""
     
@@ -208,6 +283,12 @@ class TestPreprocessingPipeline:
         byte_indexed_count = cursor.fetchone()[0]
         assert byte_indexed_count > 0
         
+        # Indexes and planner statistics are created after loading
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+        assert len(cursor.fetchall()) == 6
+        cursor = conn.execute("SELECT COUNT(*) FROM sqlite_stat1")
+        assert cursor.fetchone()[0] > 0
+        
         conn.close()
     
     def test_preprocessing_with_callback(self, temp_dir, sample_json_file):
@@ -228,3 +309,164 @@ class TestPreprocessingPipeline:
         # Check final progress update
         final_update = progress_updates[-1]
         assert final_update[1] == final_update[2]  # files_processed == total_files
+    
+    def test_progress_counts_files_before_insert(self, temp_dir):
+        """Test that progress counts each parsed file without waiting for its batch to be inserted."""
+        input_dir = temp_dir / "input"
+        input_dir.mkdir()
+        source = [{"type": "source", "qualifiers": {"organism": ["Test organism"]}}]
+        for i in range(3):
+            (input_dir / f"file_{i}.json").write_text(json.dumps({"records": [
+                {"id": f"record_{i}", "features": source},
+            ]}))
+        files = sorted(input_dir.glob("*.json"))
+        progress_updates = []
+        
+        def progress_callback(current_file, files_processed, total_files):
+            progress_updates.append(files_processed)
+        
+        preprocess_antismash_files(str(input_dir), str(temp_dir / "attributes.db"),
+                                   progress_callback, json_files=files)
+        
+        assert progress_updates == [0, 1, 2, 3]
+    
+    def test_parallel_matches_serial(self, temp_dir, monkeypatch):
+        """Test that parsing in worker processes stores the same rows as parsing in-process."""
+        input_dir = temp_dir / "input"
+        input_dir.mkdir()
+        for i in range(4):
+            records = [
+                {
+                    "id": f"record_{i}_{j}",
+                    "features": [{"type": "source", "qualifiers": {"organism": [f"Organism {i}"]}}]
+                }
+                for j in range(3)
+            ]
+            (input_dir / f"file_{i}.json").write_text(json.dumps({"records": records}))
+        (input_dir / "broken.json").write_text('{"records": [{"id": "broken"')
+        files = sorted(input_dir.glob("*.json"))
+        
+        def stored_rows(index_path):
+            conn = sqlite3.connect(index_path)
+            try:
+                records = conn.execute("SELECT * FROM records ORDER BY id").fetchall()
+                attributes = conn.execute("SELECT * FROM attributes ORDER BY id").fetchall()
+            finally:
+                conn.close()
+            return records, attributes
+        
+        serial = preprocess_antismash_files(str(input_dir), str(temp_dir / "serial.db"),
+                                            json_files=files, max_workers=1)
+        monkeypatch.setattr("bgc_viewer.preprocessing.PARALLEL_MIN_FILES", 1)
+        parallel = preprocess_antismash_files(str(input_dir), str(temp_dir / "parallel.db"),
+                                              json_files=files, max_workers=2)
+        
+        assert serial['total_records'] == parallel['total_records'] == 12
+        assert serial['total_attributes'] == parallel['total_attributes']
+        assert stored_rows(serial['database_path']) == stored_rows(parallel['database_path'])
+    
+    def test_broken_pool_falls_back_to_serial(self, temp_dir, monkeypatch):
+        """Test that the files left when a worker dies are parsed in-process."""
+        from concurrent.futures import Future
+        from concurrent.futures.process import BrokenProcessPool
+        
+        class BreakingExecutor:
+            """Runs the first two submissions, then behaves like a pool whose worker was killed."""
+            def __init__(self, *args, **kwargs):
+                self.submitted = 0
+            
+            def submit(self, fn, *args):
+                if self.submitted == 2:
+                    raise BrokenProcessPool("A worker process terminated abruptly")
+                self.submitted += 1
+                future = Future()
+                future.set_result(fn(*args))
+                return future
+            
+            def shutdown(self, **kwargs):
+                pass
+        
+        input_dir = temp_dir / "input"
+        input_dir.mkdir()
+        source = [{"type": "source", "qualifiers": {"organism": ["Test organism"]}}]
+        for i in range(5):
+            (input_dir / f"file_{i}.json").write_text(json.dumps({"records": [
+                {"id": f"record_{i}", "features": source},
+            ]}))
+        files = sorted(input_dir.glob("*.json"))
+        monkeypatch.setattr("bgc_viewer.preprocessing.PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr("bgc_viewer.preprocessing.ProcessPoolExecutor", BreakingExecutor)
+        
+        results = preprocess_antismash_files(str(input_dir), str(temp_dir / "attributes.db"),
+                                             json_files=files, max_workers=2)
+        
+        assert results['files_processed'] == 5
+        conn = sqlite3.connect(results['database_path'])
+        try:
+            assert [row[0] for row in conn.execute("SELECT record_id FROM records ORDER BY id")] == [
+                f"record_{i}" for i in range(5)
+            ]
+        finally:
+            conn.close()
+    
+    def test_failed_file_is_rolled_back(self, temp_dir):
+        """Test that a file whose rows can't be inserted leaves nothing behind."""
+        input_dir = temp_dir / "input"
+        input_dir.mkdir()
+        source = [{"type": "source", "qualifiers": {"organism": ["Test organism"]}}]
+        (input_dir / "a_duplicate.json").write_text(json.dumps({"records": [
+            {"id": "same", "features": source},
+            {"id": "same", "features": source},
+        ]}))
+        (input_dir / "b_valid.json").write_text(json.dumps({"records": [
+            {"id": "valid", "features": source},
+        ]}))
+        files = sorted(input_dir.glob("*.json"))
+        
+        results = preprocess_antismash_files(str(input_dir), str(temp_dir / "attributes.db"), json_files=files)
+        
+        assert results['files_processed'] == 1
+        conn = sqlite3.connect(results['database_path'])
+        try:
+            assert conn.execute("SELECT id, filename, record_id FROM records").fetchall() == [
+                (1, "b_valid.json", "valid")
+            ]
+            assert conn.execute("SELECT DISTINCT record_ref FROM attributes").fetchall() == [(1,)]
+        finally:
+            conn.close()
+    
+    @pytest.mark.parametrize("batch_rows", [1, 50000])
+    def test_batched_inserts_skip_failed_files(self, temp_dir, monkeypatch, batch_rows):
+        """Test that files inserted in one batch or one by one give the same rows."""
+        monkeypatch.setattr("bgc_viewer.preprocessing.INSERT_BATCH_ROWS", batch_rows)
+        input_dir = temp_dir / "input"
+        input_dir.mkdir()
+        source = [{"type": "source", "qualifiers": {"organism": ["Test organism"]}}]
+        (input_dir / "a_valid.json").write_text(json.dumps({"records": [
+            {"id": "first", "features": source},
+        ]}))
+        (input_dir / "b_duplicate.json").write_text(json.dumps({"records": [
+            {"id": "same", "features": source},
+            {"id": "same", "features": source},
+        ]}))
+        (input_dir / "c_valid.json").write_text(json.dumps({"records": [
+            {"id": "second", "features": source},
+        ]}))
+        files = sorted(input_dir.glob("*.json"))
+        
+        results = preprocess_antismash_files(str(input_dir), str(temp_dir / "attributes.db"), json_files=files)
+        
+        assert results['files_processed'] == 2
+        assert results['total_records'] == 2
+        conn = sqlite3.connect(results['database_path'])
+        try:
+            assert conn.execute("SELECT id, filename, record_id FROM records ORDER BY id").fetchall() == [
+                (1, "a_valid.json", "first"),
+                (2, "c_valid.json", "second"),
+            ]
+            assert conn.execute("SELECT DISTINCT record_ref FROM attributes ORDER BY record_ref").fetchall() == [
+                (1,), (2,)
+            ]
+            assert conn.execute("SELECT value FROM metadata WHERE key = 'total_records'").fetchone() == ("2",)
+        finally:
+            conn.close()
@@ -0,0 +1,97 @@
+"""
+Tests for the per-record lookup structures.
+"""
+
+import pytest
+from bgc_viewer.record_index import build_record_index, build_region_info, find_overlapping_features
+
+
+@pytest.fixture
+def sample_record():
+    """Record with one region and features inside and outside of it."""
+    return {
+        "id": "rec",
+        "features": [
+            {"type": "CDS", "location": "[900:1200](+)", "qualifiers": {"locus_tag": ["late"]}},
+            {"type": "region", "location": "[100:1000]", "qualifiers": {"region_number": ["1"]}},
+            {"type": "CDS", "location": "[50:150](-)", "qualifiers": {"locus_tag": ["edge"]}},
+            {"type": "gene", "location": "[200:300](+)", "qualifiers": {"gene": ["inner"]}},
+            {"type": "CDS", "location": "[1500:1800](+)", "qualifiers": {"locus_tag": ["outside"]}},
+            {"type": "CDS", "location": "join{[1:2], [3:4]}", "qualifiers": {}},
+        ]
+    }
+
+
+class TestBuildRecordIndex:
+    """Tests for build_record_index."""
+
+    def test_regions_are_indexed_by_id(self, sample_record):
+        index = build_record_index(sample_record)
+        region = index["regions"]["region_1"]
+        assert list(index["regions"]) == ["region_1"]
+        assert (region.location, region.start, region.end) == ("[100:1000]", 100, 1000)
+        assert index["region_infos"] == [region]
+
+    def test_region_info_defaults(self):
+        region = build_region_info({"type": "region", "location": "join{[1:2], [3:4]}"})
+        assert region.id == "region_unknown"
+        assert region.start is None and region.end is None
+        assert region.product == ("unknown",)
+        assert region.rules == ()
+
+    def test_features_sorted_by_start(self, sample_record):
+        index = build_record_index(sample_record)
+        # Region and unparsable locations are excluded
+        assert index["starts"] == [50, 200, 900, 1500]
+        assert index["ends"] == [150, 300, 1200, 1800]
+        assert index["positions"] == [2, 3, 0, 4]
+        assert index["max_ends"] == [150, 300, 1200, 1800]
+
+    def test_intervals_by_type(self, sample_record):
+        index = build_record_index(sample_record)
+        cds = index["intervals_by_type"]["CDS"]
+        assert cds["starts"] == [50, 900, 1500]
+        assert cds["positions"] == [2, 0, 4]
+        assert cds["max_ends"] == [150, 1200, 1800]
+        assert "region" not in index["intervals_by_type"]
+
+    def test_features_bucketed_by_type(self, sample_record):
+        index = build_record_index(sample_record)
+        features = sample_record["features"]
+        assert index["by_type"]["CDS"] == [features[0], features[2], features[4], features[5]]
+        assert index["by_type"]["region"] == [features[1]]
+
+
+class TestFindOverlappingFeatures:
+    """Tests for find_overlapping_features."""
+
+    def test_partial_overlaps_in_record_order(self, sample_record):
+        index = build_record_index(sample_record)
+        features = find_overlapping_features(index, 100, 1000)
+        assert [f["location"] for f in features] == [
+            "[900:1200](+)", "[50:150](-)", "[200:300](+)"
+        ]
+
+    def test_type_filter(self, sample_record):
+        index = build_record_index(sample_record)
+        features = find_overlapping_features(index, 100, 1000, "gene")
+        assert [f["qualifiers"]["gene"] for f in features] == [["inner"]]
+
+    def test_unknown_type(self, sample_record):
+        index = build_record_index(sample_record)
+        assert find_overlapping_features(index, 100, 1000, "tRNA") == []
+
+    def test_no_overlap(self, sample_record):
+        index = build_record_index(sample_record)
+        assert find_overlapping_features(index, 1300, 1400) == []
+
+    def test_long_feature_before_range(self):
+        # A long early feature keeps later short ones in the scan window
+        record = {"features": [
+            {"type": "CDS", "location": "[0:5000](+)"},
+            {"type": "CDS", "location": "[10:20](+)"},
+            {"type": "CDS", "location": "[3000:3100](+)"},
+        ]}
+        index = build_record_index(record)
+        features = find_overlapping_features(index, 2000, 2500)
+        assert [f["location"] for f in features] == ["[0:5000](+)"]
@@ -89,6 +89,25 @@ class TestDatabaseSearch:
                 entry2 = results_page2["entries"][0]
                 assert entry1["filename"] != entry2["filename"] or entry1["record_id"] != entry2["record_id"]
     
+    def test_keyset_pagination(self, processed_data_dir):
+        """Test continuing after the cursor of the previous page."""
+        temp_dir, result = processed_data_dir
+        db_path = str(temp_dir / "attributes.db")
+        
+        all_entries = get_database_entries(db_path, page=1, per_page=100, search="")["entries"]
+        
+        seen = []
+        after = None
+        while True:
+            results = get_database_entries(db_path, per_page=1, search="", after=after)
+            assert results["page"] == (1 if after is None else None)
+            seen.extend(entry["id"] for entry in results["entries"])
+            if results["next_cursor"] is None:
+                break
+            after = (results["next_cursor"]["after_filename"], results["next_cursor"]["after_record_id"])
+        
+        assert seen == [entry["id"] for entry in all_entries]
+    
     def test_database_not_found(self, temp_dir):
         """Test behavior when database doesn't exist."""
         nonexistent_db = str(temp_dir / "nonexistent.db")
@@ -97,6 +116,7 @@ class TestDatabaseSearch:
         
         assert "error" in results
         assert "No database found" in results["error"]
+        assert not (temp_dir / "nonexistent.db").exists()
 
 
 class TestSearchAttributeValues:
@@ -134,3 +154,91 @@ class TestSearchAttributeValues:
         # Should return same number of results regardless of case
         assert results_lower["total"] == results_upper["total"]
         assert results_lower["total"] == results_mixed["total"]
+    
+    def test_wildcards_are_literal(self, processed_data_dir):
+        """Test that % and _ in search terms only match themselves."""
+        temp_dir, result = processed_data_dir
+        db_path = str(temp_dir / "attributes.db")
+        
+        assert get_database_entries(db_path, page=1, per_page=10, search="record_1")["total"] == 1
+        assert get_database_entries(db_path, page=1, per_page=10, search="record%1")["total"] == 0
+        assert get_database_entries(db_path, page=1, per_page=10, search="re_ord")["total"] == 0
+        assert get_database_entries(db_path, page=1, per_page=10, search="_")["total"] == 2
+    
+    def test_search_without_search_index(self, processed_data_dir):
+        """Test that databases without the trigram index give the same results."""
+        import sqlite3
+        
+        temp_dir, result = processed_data_dir
+        db_path = str(temp_dir / "attributes.db")
+        searches = ["polyketide", "COELICOLOR synthase", "Ba", "record_2", "test.json", "nothing_matches"]
+        
+        with_index = [get_database_entries(db_path, page=1, per_page=10, search=s)["entries"] for s in searches]
+        assert with_index[0] and not with_index[-1]
+        
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE records_fts")
+        conn.execute("DROP TABLE attributes_fts")
+        conn.commit()
+        conn.close()
+        
+        without_index = [get_database_entries(db_path, page=1, per_page=10, search=s)["entries"] for s in searches]
+        assert with_index == without_index
+    
+    def test_cluster_types_of_older_databases(self, processed_data_dir):
+        """Test that cluster types are collected from the attributes if records don't store them."""
+        import sqlite3
+        
+        temp_dir, result = processed_data_dir
+        db_path = str(temp_dir / "attributes.db")
+        
+        stored = get_database_entries(db_path, page=1, per_page=10)["entries"]
+        assert any(entry["cluster_types"] for entry in stored)
+        
+        conn = sqlite3.connect(db_path)
+        conn.execute("ALTER TABLE records DROP COLUMN cluster_types")
+        conn.commit()
+        conn.close()
+        
+        collected = get_database_entries(db_path, page=1, per_page=10)["entries"]
+        assert collected == stored
+        
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE attributes SET attribute_value = 'NRPS,PKS' WHERE attribute_name = 'region1_type'")
+        conn.commit()
+        conn.close()
+        
+        entries = get_database_entries(db_path, page=1, per_page=10)["entries"]
+        assert any("NRPS,PKS" in entry["cluster_types"] for entry in entries)
+    
+    def test_total_without_stored_record_count(self, processed_data_dir):
+        """Test that the records are counted if the database doesn't store their number."""
+        import sqlite3
+        
+        temp_dir, result = processed_data_dir
+        db_path = str(temp_dir / "attributes.db")
+        assert get_database_entries(db_path, page=1, per_page=10)["total"] == result["total_records"]
+        
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM metadata WHERE key = 'total_records'")
+        conn.commit()
+        conn.close()
+        
+        assert get_database_entries(db_path, page=1, per_page=10)["total"] == result["total_records"]
+    
+    def test_unfiltered_page_scans_covering_index(self, processed_data_dir):
+        """Test that the IDs of an unfiltered page are read from the (filename, record_id) index alone."""
+        import sqlite3
+        from bgc_viewer.database import build_entries_queries
+        
+        temp_dir, result = processed_data_dir
+        db_path = str(temp_dir / "attributes.db")
+        _, page_query = build_entries_queries((), False, True)
+        
+        conn = sqlite3.connect(db_path)
+        try:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + page_query, (10, 0))]
+        finally:
+            conn.close()
+        
+        assert any("COVERING INDEX idx_records_filename_record_id" in step for step in plan)
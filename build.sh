@@ -60,6 +60,8 @@ if [ -d "../frontend/build" ]; then
     mkdir -p bgc_viewer/static
     cp -r ../frontend/build/* bgc_viewer/static/
     echo "Frontend assets copied to bgc_viewer/static/"
+    # Write .gz/.br variants that the server sends to clients accepting them
+    uv run python ../scripts/precompress.py bgc_viewer/static
 else
     echo "Warning: Frontend not built. Something went wrong."
     exit 1
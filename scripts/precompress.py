@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Write precompressed .gz and .br variants of the frontend build files.
+
+The backend sends these instead of the original files to clients that accept
+the encoding, so bundles don't have to be compressed on every request.
+
+Usage: python scripts/precompress.py <static_dir>
+"""
+
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Only text assets compress well; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.mjs', '.css', '.svg', '.json', '.txt', '.map')
+# Files smaller than this aren't worth a separate variant
+MIN_SIZE = 1024
+
+
+def precompress(static_dir):
+    """Write .gz (and .br if brotli is installed) next to every compressible file."""
+    count = 0
+    for directory, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, 'rb') as f:
+                content = f.read()
+            if len(content) < MIN_SIZE:
+                continue
+
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(content, quality=11))
+            count += 1
+
+    print(f"Precompressed {count} files in {static_dir}" + ("" if brotli else " (gzip only, brotli not installed)"))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    precompress(sys.argv[1])